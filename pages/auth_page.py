@@ -1,11 +1,18 @@
 # pages/auth_page.py
 import pyotp
-from playwright.sync_api import Page
+from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
 from utils.base_test import BaseTest
+from utils.checkpoints import checkpointed
+from utils.coverage_index import covered
+from utils.metrics import timed
+from utils.config import BASE_URL
+from utils.readiness import SelectorReady
 from utils.logger import logger
 
+@covered
 class AuthPage:
-    URL = "https://godex.io/sign-in"
+    URL = f"{BASE_URL}/sign-in"
+    TRANSACTIONS_URL = f"{BASE_URL}/stats/transactions"
     
     # Локаторы для формы входа
     EMAIL_INPUT = 'input[name="email"]'
@@ -17,10 +24,22 @@ class AuthPage:
     TWOFA_INPUT = 'input[name="code 2-fa"]'
     TWOFA_CONFIRM_BTN = 'button.form-verification-code__btn-yes:has-text("Confirm")'
 
+    # Локатор заголовка личного кабинета после входа
+    ACCOUNT_TITLE = 'h2.gdx-h2.account__title'
+
+    # Признаки готовности: форма входа и личный кабинет после входа
+    READY = SelectorReady(EMAIL_INPUT)
+    TRANSACTIONS_READY = SelectorReady(ACCOUNT_TITLE)
+
     def __init__(self, page: Page):
         self.page = page
         self.base = BaseTest(page)
 
+    def go_to_sign_in(self) -> None:
+        """Открывает страницу входа и ждёт готовности формы."""
+        self.base.open_url(self.URL, timeout=60000, ready=self.READY)
+
+    @checkpointed("login")
     def login_without_2fa(self, email: str, password: str) -> None:
         """
         Вход без 2FA. Ожидает переход на страницу транзакций.
@@ -32,7 +51,7 @@ class AuthPage:
         logger.info(f"Вход без 2FA для пользователя: {email}")
         
         # Открытие страницы логина (использует улучшенный open_url из base_test)
-        self.base.open_url(self.URL, timeout=60000)
+        self.base.open_url(self.URL, timeout=60000, ready=self.READY)
         
         # Заполнение формы
         self.base.fill_input(self.EMAIL_INPUT, email)
@@ -43,13 +62,19 @@ class AuthPage:
         
         # Ожидание перехода на страницу транзакций
         try:
-            self.page.wait_for_url("https://godex.io/stats/transactions", timeout=15000)
+            self.base.until(
+                lambda t: self.page.wait_for_url(self.TRANSACTIONS_URL, wait_until="commit", timeout=t),
+                15000, "переход после входа"
+            )
+            self.base.wait_until_ready(self.TRANSACTIONS_READY, timeout=15000, step="login")
             logger.info(f"Успешный вход. Текущий URL: {self.page.url}")
-        except TimeoutError:
+        except (TimeoutError, PlaywrightTimeoutError):
             current_url = self.page.url
             logger.error(f"Не удалось перейти на страницу транзакций. Текущий URL: {current_url}")
             raise AssertionError(f"Ожидался переход на /dashboard/transactions, но URL стал: {current_url}")
 
+    @checkpointed("login_with_2fa")
+    @timed("login_with_2fa")
     def login_with_2fa(self, email: str, password: str, secret: str) -> None:
         """
         Вход с 2FA. Ожидает переход на страницу транзакций после подтверждения 2FA.
@@ -62,7 +87,7 @@ class AuthPage:
         logger.info(f"Вход с 2FA для пользователя: {email}")
         
         # Открытие страницы логина (использует улучшенный open_url из base_test)
-        self.base.open_url(self.URL, timeout=60000)
+        self.base.open_url(self.URL, timeout=60000, ready=self.READY)
         
         # Заполнение формы
         self.base.fill_input(self.EMAIL_INPUT, email)
@@ -74,9 +99,12 @@ class AuthPage:
         # Ожидание появления 2FA-попапа
         logger.info("Ожидание появления 2FA-попапа...")
         try:
-            self.page.wait_for_selector(self.TWOFA_CONTAINER, timeout=15000, state="visible")
+            self.base.until(
+                lambda t: self.page.wait_for_selector(self.TWOFA_CONTAINER, timeout=t, state="visible"),
+                15000, "2FA-попап"
+            )
             logger.info("2FA-попап появился")
-        except TimeoutError:
+        except (TimeoutError, PlaywrightTimeoutError):
             raise AssertionError("2FA-попап не появился за 15 секунд")
         
         # Генерация и ввод 2FA-кода
@@ -85,7 +113,7 @@ class AuthPage:
         
         # Ввод кода
         try:
-            self.page.fill(self.TWOFA_INPUT, code)
+            self.page.fill(self.TWOFA_INPUT, code, timeout=self.base.budget(5000, "ввод 2FA-кода"))
             logger.info("2FA-код введен")
         except Exception as e:
             logger.warning(f"Ошибка при вводе кода через fill(): {e}")
@@ -103,11 +131,13 @@ class AuthPage:
         
         # Ожидание перехода на страницу транзакций
         try:
-            self.page.wait_for_url("https://godex.io/stats/transactions", timeout=20000)
+            self.base.until(
+                lambda t: self.page.wait_for_url(self.TRANSACTIONS_URL, wait_until="commit", timeout=t),
+                20000, "переход после 2FA"
+            )
             logger.info("Успешный вход с 2FA. Переход на страницу транзакций")
-            # Ожидание полной загрузки страницы
-            self.page.wait_for_load_state("networkidle", timeout=10000)
-            logger.info("Страница транзакций полностью загружена")
-        except TimeoutError:
+            # Ожидание готовности личного кабинета
+            self.base.wait_until_ready(self.TRANSACTIONS_READY, timeout=15000, step="login_with_2fa")
+        except (TimeoutError, PlaywrightTimeoutError):
             current_url = self.page.url
             raise AssertionError(f"Не удалось перейти на страницу транзакций после 2FA. Текущий URL: {current_url}")
\ No newline at end of file
@@ -1,11 +1,16 @@
 # pages/main_page.py
-from playwright.sync_api import Page
+from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
 from utils.base_test import BaseTest
+from utils.coverage_index import covered
+from utils.metrics import timed
+from utils.config import BASE_URL
+from utils.readiness import SelectorReady
 from utils.logger import logger
 from pages.auth_page import AuthPage
 
+@covered
 class MainPage:  
-    URL = "https://godex.io/"  # Исправлено: убраны лишние пробелы
+    URL = f"{BASE_URL}/"
     
     # Локаторы
     DASHBOARD_LINK = 'header a.gdx-header__sign-in.size-2'
@@ -14,17 +19,21 @@ class MainPage:
     SEND_INPUT = 'div.exchange-input:first-child input' # Поле ввода "You Send"
     RECEIVE_INPUT = 'div.exchange-input:last-child input' # Поле ввода "You Get"
     EXCHANGE_BUTTON = 'a.exchange-button' # Кнопка Exchange
+
+    # Признак готовности: отрисована форма обмена
+    READY = SelectorReady(EXCHANGE_FORM)
     
     def __init__(self, page: Page):
         self.page = page
         self.base = BaseTest(page)
         
+    @timed("navigate_to_main")
     def navigate_to_main(self) -> 'MainPage': # Добавлен возврат self для цепочки вызовов
         """
         Переход на главную страницу
         """
         logger.info("Открытие главной страницы")
-        self.base.open_url(self.URL.strip(), wait_until="networkidle", timeout=30000) # .strip() убирает пробелы
+        self.base.open_url(self.URL, timeout=30000, ready=self.READY)
         return self # Возвращаем self для возможности цепочки вызовов
         
     def click_dashboard(self) -> AuthPage:
@@ -44,9 +53,9 @@ class MainPage:
         
         # Ожидаем перехода на страницу логина
         try:
-            self.page.wait_for_url("**/sign-in", timeout=10000)
+            self.base.until(lambda t: self.page.wait_for_url("**/sign-in", timeout=t), 10000, "переход на вход")
             logger.info("Успешный переход на страницу логина")
-        except Exception as e:
+        except PlaywrightTimeoutError:
             current_url = self.page.url
             logger.error(f"Не удалось перейти на страницу логина. Текущий URL: {current_url}")
             raise AssertionError(f"Ожидался переход на /sign-in, но URL стал: {current_url}")
@@ -62,7 +71,7 @@ class MainPage:
             bool: True если кнопка видна, False если нет
         """
         try:
-            return self.page.locator(self.DASHBOARD_LINK).is_visible(timeout=5000)
+            return self.page.locator(self.DASHBOARD_LINK).is_visible()
         except:
             return False
 
@@ -72,38 +81,40 @@ class MainPage:
     def select_send_currency(self, currency: str) -> None:
         """Выбор монеты для You Send"""
         logger.info(f"Выбор монеты 'You Send': {currency}")
+        timeout = self.base.budget(10000, "выбор монеты You Send")
         # Клик по полю ввода "You Send" для активации выбора
-        self.page.click(self.SEND_INPUT)
+        self.page.click(self.SEND_INPUT, timeout=timeout)
         # Заполняем поле названием монеты
-        self.page.fill(self.SEND_INPUT, currency)
+        self.page.fill(self.SEND_INPUT, currency, timeout=timeout)
         # Нажимаем Enter для подтверждения выбора (если это требуется UI)
-        self.page.press(self.SEND_INPUT, 'Enter')
+        self.page.press(self.SEND_INPUT, 'Enter', timeout=timeout)
         
     def select_receive_currency(self, currency: str) -> None:
         """Выбор монеты для You Get"""
         logger.info(f"Выбор монеты 'You Get': {currency}")
+        timeout = self.base.budget(10000, "выбор монеты You Get")
         # Клик по полю ввода "You Get" для активации выбора
-        self.page.click(self.RECEIVE_INPUT)
+        self.page.click(self.RECEIVE_INPUT, timeout=timeout)
         # Заполняем поле названием монеты
-        self.page.fill(self.RECEIVE_INPUT, currency)
+        self.page.fill(self.RECEIVE_INPUT, currency, timeout=timeout)
         # Нажимаем Enter для подтверждения выбора (если это требуется UI)
-        self.page.press(self.RECEIVE_INPUT, 'Enter')
+        self.page.press(self.RECEIVE_INPUT, 'Enter', timeout=timeout)
         
     def set_send_amount(self, amount: str) -> None:
         """Установка суммы для You Send"""
         logger.info(f"Установка суммы 'You Send': {amount}")
-        self.page.fill(self.SEND_INPUT, amount)
+        self.page.fill(self.SEND_INPUT, amount, timeout=self.base.budget(10000, "сумма You Send"))
         
     def set_receive_amount(self, amount: str) -> None:
         """Установка суммы для You Get"""
         logger.info(f"Установка суммы 'You Get': {amount}")
-        self.page.fill(self.RECEIVE_INPUT, amount)
+        self.page.fill(self.RECEIVE_INPUT, amount, timeout=self.base.budget(10000, "сумма You Get"))
         
     def click_exchange_button(self) -> None:
         """Нажатие кнопки Exchange"""
         logger.info("Нажатие кнопки Exchange")
         # Дождаться, пока кнопка станет кликабельной (не disabled)
-        self.page.wait_for_selector(f"{self.EXCHANGE_BUTTON}:not([disabled])", timeout=10000)
-        self.page.click(self.EXCHANGE_BUTTON)
+        self.base.wait_for_element(f"{self.EXCHANGE_BUTTON}:not([disabled])", timeout=10000)
+        self.page.click(self.EXCHANGE_BUTTON, timeout=self.base.budget(5000, "клик Exchange"))
 
     
\ No newline at end of file
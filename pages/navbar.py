@@ -1,6 +1,8 @@
 from playwright.sync_api import Page
 from utils.base_test import BaseTest
+from utils.coverage_index import covered
 
+@covered
 class Navbar:
     ACCOUNT_DROPDOWN = 'div.gdx-account-select'
     LOGOUT_OPTION    = 'ul[role="listbox"] >> text=Log out'
@@ -12,4 +14,4 @@ class Navbar:
     def logout(self) -> None:
         self.base.click(self.ACCOUNT_DROPDOWN)
         self.base.click(self.LOGOUT_OPTION)
-        self.page.wait_for_url("**/sign-in", timeout=10000)
+        self.base.wait_for_url("**/sign-in", timeout=10000)
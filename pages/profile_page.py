@@ -1,10 +1,16 @@
 # pages/profile_page.py
-from playwright.sync_api import Page
+from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
 from utils.base_test import BaseTest
+from utils.checkpoints import checkpointed
+from utils.coverage_index import covered
+from utils.metrics import timed
+from utils.config import BASE_URL
+from utils.readiness import SelectorReady
 from utils.logger import logger
 
+@covered
 class ProfilePage:
-    URL = "https://godex.io/dashboard/profile"
+    URL = f"{BASE_URL}/dashboard/profile"
 
     # Локаторы для навигации
     PROFILE_MENU_ITEM = 'a[href="/dashboard/profile"]'
@@ -29,10 +35,14 @@ class ProfilePage:
     TWOFA_ENABLED_BLOCK = 'div.gdx-2-fa-on-off-block:has-text("2-Step Verification is On")'
     TWOFA_DISABLED_BLOCK = 'div.gdx-2-fa-on-off-block:has-text("2-Step Verification is Off")'
 
+    # Признак готовности: видна одна из кнопок 2FA
+    READY = SelectorReady(f"{ENABLE_BTN}, {DISABLE_BTN}")
+
     def __init__(self, page: Page):
         self.page = page
         self.base = BaseTest(page)
 
+    @checkpointed("profile")
     def go_to_profile_from_transactions(self) -> None:
         """
         Переход на страницу профиля со страницы транзакций.
@@ -43,22 +53,22 @@ class ProfilePage:
         self.base.click(self.PROFILE_MENU_ITEM)
         
         # Ждем перехода на страницу профиля
-        self.page.wait_for_url("**/dashboard/profile", timeout=15000)
-        
-        # Ждем загрузки страницы профиля
-        self.page.wait_for_load_state("networkidle", timeout=10000)
+        self.base.until(
+            lambda t: self.page.wait_for_url("**/dashboard/profile", wait_until="commit", timeout=t),
+            15000, "переход в профиль"
+        )
         
         # Ждем появления одной из кнопок 2FA для подтверждения загрузки
-        self.page.wait_for_selector(f"{self.ENABLE_BTN}, {self.DISABLE_BTN}", state="visible", timeout=15000)
+        self.base.wait_until_ready(self.READY, timeout=15000, step="profile")
         
         logger.info("Страница профиля успешно загружена")
 
+    @checkpointed("profile")
     def navigate_to(self) -> None:
         """Прямой переход на страницу профиля по URL."""
         logger.info("Прямой переход на страницу профиля")
-        self.base.open_url(self.URL)
-        # Дождемся загрузки страницы и появления одной из кнопок 2FA
-        self.page.wait_for_selector(f"{self.ENABLE_BTN}, {self.DISABLE_BTN}", state="visible", timeout=15000)
+        # Навигация ждёт только появления одной из кнопок 2FA
+        self.base.open_url(self.URL, timeout=30000, ready=self.READY)
         logger.info("Страница профиля загружена")
 
     def wait_for_enable_state(self) -> None:
@@ -71,6 +81,7 @@ class ProfilePage:
         logger.info("Ожидание состояния отключения 2FA")
         self.base.wait_for_element(self.DISABLE_BTN, timeout=15000)
 
+    @timed("enable_2fa")
     def enable_2fa(self) -> str:
         """
         Включить 2FA:
@@ -93,7 +104,9 @@ class ProfilePage:
         self.base.wait_for_element(self.SECRET_TEXT, timeout=10000)
         
         # Шаг 4: Вернуть секрет
-        secret = self.page.locator(self.SECRET_TEXT).inner_text().strip()
+        secret = self.page.locator(self.SECRET_TEXT).inner_text(
+            timeout=self.base.budget(5000, "чтение секрета 2FA")
+        ).strip()
         logger.info(f"Секрет 2FA получен: {secret[:10]}...")
         return secret
 
@@ -114,9 +127,12 @@ class ProfilePage:
         
         # Дождаться закрытия модального окна
         try:
-            self.page.wait_for_selector(self.TWOFA_MODAL, state="detached", timeout=10000)
+            self.base.until(
+                lambda t: self.page.wait_for_selector(self.TWOFA_MODAL, state="detached", timeout=t),
+                10000, "закрытие окна 2FA"
+            )
             logger.info("Модальное окно 2FA закрыто")
-        except:
+        except PlaywrightTimeoutError:
             logger.warning("Модальное окно 2FA не закрылось, продолжаем...")
         
         # Дождаться появления блока с включенным 2FA
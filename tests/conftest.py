@@ -1,21 +1,71 @@
 # conftest.py
 import os
+import time
 import pytest
-import pyotp
 from dotenv import load_dotenv
-from typing import Generator
+from typing import Generator, Optional
 from playwright.sync_api import sync_playwright, Playwright, Browser, BrowserContext, Page
 from pages.auth_page import AuthPage
 from pages.main_page import MainPage
 from pages.profile_page import ProfilePage
 from pages.navbar import Navbar
 from utils.base_test import BaseTest
-from utils.helpers import take_screenshot
+from utils.metrics import page_steps
+from utils.flaky import FlakyPlugin, OutcomeHistory
+from utils.asset_cache import ASSET_CACHE, StaticAssetCache
+from utils.account_state import ON, OFF, AccountStateTracker, AccountStatePlugin
+from utils.deadline import DeadlinePlugin
+from utils.page_watcher import FAIL_FAST, watch_page, watcher_for
+from utils.engines import EngineMatrixPlugin, launch
+from utils.coverage_index import CoverageIndexPlugin
+from utils.memory_watchdog import BrowserManager
+from utils.page_weight import PAGE_WEIGHT_MODE, PageWeightPlugin, WeightHistory, track_page
+from utils.teardown_queue import TeardownQueue
+from utils.checkpoints import CheckpointStore, should_resume, start_journey
+from utils.emulation import EmulationPlugin, Profile, apply_to_context, attach_har, get_profile
 from pytest_html import extras
 from utils.logger import logger
 
 load_dotenv(override=True)
 
+def pytest_configure(config):
+    config.addinivalue_line("markers", "reruns(n): свой бюджет перезапусков для теста")
+    # Перезапуски упавших тестов на тёплом браузере, история исходов и карантин
+    config.pluginmanager.register(FlakyPlugin(OutcomeHistory()), "gdx_flaky")
+    config.addinivalue_line(
+        "markers", "account_state(requires, leaves): состояние 2FA аккаунта до и после теста"
+    )
+    # Порядок тестов по состоянию аккаунта и пропуск лишних переключений 2FA
+    tracker = AccountStateTracker()
+    config.pluginmanager.register(AccountStatePlugin(tracker), "gdx_account_state")
+    config.addinivalue_line(
+        "markers", "checkpoints(enabled): восстанавливать ли шаги из контрольных точек при повторе"
+    )
+    # Контрольные точки сценариев: повтор теста продолжает с последнего успешного шага
+    config.pluginmanager.register(CheckpointStore(tracker), "gdx_checkpoints")
+    config.addinivalue_line(
+        "markers", "budget(ms, setup=ms, teardown=ms): бюджет времени теста и его фикстур"
+    )
+    # Бюджет времени на каждую фазу теста, который ограничивает все ожидания
+    config.pluginmanager.register(DeadlinePlugin(), "gdx_deadline")
+    config.addinivalue_line(
+        "markers", "fail_fast(enabled): прерывать ожидания при ошибках API и исключениях на странице"
+    )
+    config.addinivalue_line("markers", "xdist_group(name): группа тестов для одного воркера xdist")
+    # Матрица движков из BROWSERS: параметр engine, группы xdist и сводка по движкам
+    config.pluginmanager.register(EngineMatrixPlugin(), "gdx_engines")
+    # Индекс покрытия селекторов и выбор затронутых тестов (SELECT_AFFECTED=1)
+    config.pluginmanager.register(CoverageIndexPlugin(config), "gdx_coverage_index")
+    config.addinivalue_line(
+        "markers", "emulation: параметризовать тест профилями сети/CPU из EMULATION_PROFILES"
+    )
+    # Профили эмуляции сети и CPU и сводка шагов по профилям
+    config.pluginmanager.register(EmulationPlugin(), "gdx_emulation")
+    # Вес страниц: запросы и байты по просмотрам, сравнение с историей
+    config.pluginmanager.register(PageWeightPlugin(WeightHistory()), "gdx_page_weight")
+    # Фоновая очистка: отключение 2FA через API и запись скриншотов не задерживают следующий тест
+    config.pluginmanager.register(TeardownQueue(), "gdx_teardown")
+
 @pytest.fixture(scope="session")
 def creds() -> tuple[str, str]:
     email = os.getenv("EMAIL", "")
@@ -30,21 +80,67 @@ def pw() -> Generator[Playwright, None, None]:
         yield p
 
 @pytest.fixture(scope="session")
-def browser(pw: Playwright) -> Generator[Browser, None, None]:
-    browser = pw.chromium.launch(headless=False, slow_mo=50)
-    yield browser
-    browser.close()
+def engine(request) -> str:
+    """Движок браузера; параметризуется плагином gdx_engines из BROWSERS."""
+    return request.param
+
+@pytest.fixture(scope="session")
+def browser_manager(pw: Playwright, engine: str) -> Generator[BrowserManager, None, None]:
+    """Браузер движка на весь прогон, перезапускаемый между тестами по порогам памяти."""
+    logger.info(f"Запуск браузера: {engine}")
+    manager = BrowserManager(lambda: launch(pw, engine), engine)
+    yield manager
+    manager.close()
+
+@pytest.fixture(scope="function")
+def browser(request, browser_manager: BrowserManager) -> Generator[Browser, None, None]:
+    started = time.perf_counter()
+    yield browser_manager.browser
+    # Все контексты теста уже закрыты — можно замерить память и при необходимости перезапустить браузер
+    browser_manager.after_test(request.node.nodeid, time.perf_counter() - started)
+
+@pytest.fixture(scope="session")
+def asset_cache() -> Generator[Optional[StaticAssetCache], None, None]:
+    """Общий дисковый кэш статики (включается ASSET_CACHE=1)."""
+    if not ASSET_CACHE:
+        yield None
+        return
+    cache = StaticAssetCache()
+    yield cache
+    logger.info(cache.summary())
 
 @pytest.fixture(scope="function")
-def context(browser: Browser) -> Generator[BrowserContext, None, None]:
-    ctx = browser.new_context()
+def emulation(request) -> Profile:
+    """Профиль эмуляции теста; параметризуется плагином gdx_emulation для тестов с маркером emulation."""
+    return get_profile(getattr(request, "param", "none"))
+
+@pytest.fixture(scope="function")
+def context(
+    browser: Browser, asset_cache: Optional[StaticAssetCache], emulation: Profile
+) -> Generator[BrowserContext, None, None]:
+    if asset_cache:
+        # Service worker обходит route, поэтому при включённом кэше он блокируется
+        ctx = browser.new_context(service_workers="block")
+        asset_cache.attach(ctx)
+    else:
+        ctx = browser.new_context()
+    attach_har(ctx)
+    apply_to_context(ctx, emulation)
     yield ctx
     ctx.close()
 
 @pytest.fixture(scope="function")
-def page(context: BrowserContext) -> Generator[Page, None, None]:
+def page(request, context: BrowserContext) -> Generator[Page, None, None]:
     pg = context.new_page()
+    marker = request.node.get_closest_marker("fail_fast")
+    if (marker.args[0] if marker and marker.args else FAIL_FAST):
+        watch_page(pg)
+    if PAGE_WEIGHT_MODE != "off":
+        track_page(pg)
+    start_journey(pg, request.config.pluginmanager.get_plugin("gdx_checkpoints"),
+                  request.node.nodeid, should_resume(request.node))
     yield pg
+    request.getfixturevalue("browser_manager").sample_page(pg)
     pg.close()
 
 @pytest.fixture(scope="function")
@@ -67,75 +163,79 @@ def profile_page(page: Page) -> ProfilePage:
 def navbar(page: Page) -> Navbar:
     return Navbar(page)
 
-# Улучшенная фикстура для работы с 2FA - теперь с функциональным scope
+@pytest.fixture(scope="session")
+def account_state(pytestconfig) -> AccountStateTracker:
+    """Трекер состояния 2FA тестового аккаунта."""
+    return pytestconfig.pluginmanager.get_plugin("gdx_account_state").tracker
+
+@pytest.fixture(scope="session")
+def teardown_queue(pytestconfig) -> TeardownQueue:
+    """Очередь фоновой очистки."""
+    return pytestconfig.pluginmanager.get_plugin("gdx_teardown")
+
+@pytest.fixture(autouse=True)
+def _ensure_account_state(request) -> None:
+    """Приводит аккаунт к состоянию из маркера account_state, если оно ещё не такое."""
+    if "creds" in request.fixturenames:
+        # Барьер: аккаунт не используется, пока не завершилась его фоновая очистка
+        request.getfixturevalue("teardown_queue").wait_for(request.getfixturevalue("creds")[0])
+    requires = request.node.get_closest_marker("account_state")
+    if not requires or not requires.kwargs.get("requires"):
+        return
+    email, pwd = request.getfixturevalue("creds")
+    tracker = request.getfixturevalue("account_state")
+    tracker.ensure(requires.kwargs["requires"], request.getfixturevalue("browser"), email, pwd)
+
+# Фикстура для работы с 2FA: переиспользует уже включённую 2FA
 @pytest.fixture(scope="function")
-def setup_2fa(auth_page: AuthPage, profile_page: ProfilePage, creds: tuple[str, str]) -> str:
+def setup_2fa(
+    request, account_state: AccountStateTracker, browser: Browser, creds: tuple[str, str], teardown_queue: TeardownQueue
+) -> str:
     """
     Фикстура для настройки 2FA в рамках одного теста.
-    Возвращает секрет и автоматически очищает состояние после теста.
+    Включает 2FA только если она ещё не включена, возвращает секрет и после теста
+    отключает 2FA, если следующему тесту не нужна включённая.
     """
     email, pwd = creds
-    secret = None
 
     try:
-        # 1. Выполняем вход без 2FA
-        auth_page.full_login(email, pwd)
-
-        # 2. Переходим на страницу профиля
-        profile_page.navigate_to()
-
-        # 3. Включаем 2FA и получаем секрет
-        secret = profile_page.enable_2fa()
-
-        # 4. Сохраняем секрет для отладки и использования другими тестами
-        path = os.path.join(os.getcwd(), "last_twofa_secret.txt")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(secret)
-        logger.info(f"2FA secret saved to {path}")
-
-        # 5. Подтверждаем включение 2FA
-        code = pyotp.TOTP(secret).now()
-        profile_page.confirm_enable_2fa(code)
-
-        logger.info("2FA enabled via setup_2fa fixture")
-
+        teardown_queue.wait_for(email)
+        account_state.ensure(ON, browser, email, pwd)
     except Exception as e:
         logger.error(f"Failed to setup 2FA in fixture: {e}")
         pytest.fail(f"2FA setup failed: {e}")
 
     # --- Передача значения секрета в тест ---
-    yield secret
+    yield account_state.current.secret
     # --- Конец передачи значения ---
 
-    # --- Автоматическая очистка (отключение 2FA) после теста ---
+    # --- Очистка (отключение 2FA), если следующему тесту она не нужна ---
+    if account_state.next_requirement == ON:
+        logger.info("Next test needs 2FA enabled, skipping disable teardown")
+        return
+    if account_state.can_disable_via_api():
+        # Отключение через API не требует браузера — выполняется в фоне, следующий тест ждёт его по барьеру
+        teardown_queue.submit(
+            request.node.nodeid, "отключение 2FA через API", lambda: account_state.disable_via_api(pwd), key=email
+        )
+        return
     try:
         logger.info("Attempting to disable 2FA after test (teardown)")
-        # Для отключения 2FA нужен код TOTP и пароль
-        if secret: # Убедимся, что секрет был создан
-            disable_code = pyotp.TOTP(secret).now()
-            profile_page.disable_2fa(pwd, disable_code) # Используем обновлённый метод
-            logger.info("2FA disabled after test (teardown successful)")
-        else:
-            logger.warning("2FA secret was not generated, skipping disable teardown")
+        account_state.ensure(OFF, browser, email, pwd)
+        logger.info("2FA disabled after test (teardown successful)")
     except Exception as e:
         logger.warning(f"Failed to disable 2FA after test (teardown failed): {e}")
+        account_state.mark_unknown()
         # Не вызываем pytest.fail здесь, чтобы не маскировать ошибку основного теста
-    # --- Конец автоматической очистки ---
+    # --- Конец очистки ---
 
-# Безопасная фикстура для чтения сохраненного секрета
-@pytest.fixture(scope="session")
-def saved_twofa_secret() -> str:
-    path = os.path.join(os.getcwd(), "last_twofa_secret.txt")
-    if not os.path.exists(path):
-        pytest.skip("Файл last_twofa_secret.txt не найден — сначала запустите тест с настройкой 2FA")
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            secret = f.read().strip()
-        if not secret:
-            pytest.skip("Секрет 2FA пуст — проверьте содержимое last_twofa_secret.txt")
-        return secret
-    except Exception as e:
-        pytest.skip(f"Ошибка при чтении секрета 2FA: {e}")
+# Секрет 2FA из трекера состояния аккаунта
+@pytest.fixture(scope="function")
+def saved_twofa_secret(account_state: AccountStateTracker) -> str:
+    secret = account_state.current.secret
+    if not secret:
+        pytest.skip("Секрет 2FA неизвестен — сначала запустите тест с настройкой 2FA")
+    return secret
 
 # Улучшенная обработка скриншотов
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
@@ -146,12 +246,22 @@ def pytest_runtest_makereport(item, call):
     if not page or rep.when != "call":
         return
 
+    steps = page_steps(page)
+    if steps:
+        rep.sections.append(("Шаги", "\n".join(f"{s['step']}: {s['ms']} ms" for s in steps)))
+    watcher = watcher_for(page)
+    if watcher and watcher.events:
+        rep.sections.append(("Сигналы страницы", "\n".join(watcher.events)))
+
+    # Скриншот снимается сразу, а запись файла уходит в фоновую очередь.
+    # Вся страница — только при падении, для прошедшего теста хватает видимой области
+    queue = item.config.pluginmanager.get_plugin("gdx_teardown")
     try:
         if rep.failed:
-            take_screenshot(page, f"{item.name}_failure")
+            queue.screenshot(page, f"{item.name}_failure", item.nodeid, full_page=True)
             logger.error(f"Test {item.name} failed, screenshot taken")
         elif rep.passed:
-            take_screenshot(page, f"{item.name}_success")
+            queue.screenshot(page, f"{item.name}_success", item.nodeid)
             logger.info(f"Test {item.name} passed, screenshot taken")
     except Exception as e:
         logger.warning(f"Failed to take screenshot: {e}")
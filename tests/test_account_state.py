@@ -0,0 +1,45 @@
+# tests/test_account_state.py
+# План порядка тестов по состоянию аккаунта — без браузера и стенда.
+
+import pytest
+from utils.account_state import OFF, ON, end_state, plan_order
+
+
+class FakeItem:
+    def __init__(self, name: str, **kwargs):
+        self.name = name
+        self.marker = pytest.mark.account_state(**kwargs).mark if kwargs else None
+
+    def get_closest_marker(self, name: str):
+        return self.marker if name == "account_state" else None
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+def names(items) -> list[str]:
+    return [i.name for i in items]
+
+
+def test_unknown_start_begins_with_most_needed_requirement():
+    items = [
+        FakeItem("enable", requires=OFF, leaves=ON),
+        FakeItem("login_2fa", requires=ON),
+        FakeItem("login", requires=OFF),
+        FakeItem("api_login", requires=OFF),
+        FakeItem("main"),
+    ]
+    planned = plan_order(items, None)
+    # Трём тестам нужна выключенная 2FA, одному — включённая: начинаем с OFF
+    assert names(planned) == ["main", "login", "api_login", "enable", "login_2fa"]
+    assert end_state(planned, None) == ON
+
+
+def test_known_start_reuses_state_before_switching():
+    items = [
+        FakeItem("login", requires=OFF),
+        FakeItem("disable", requires=ON, leaves=OFF),
+        FakeItem("login_2fa", requires=ON),
+    ]
+    assert names(plan_order(items, ON)) == ["login_2fa", "disable", "login"]
+    assert names(plan_order(items, OFF)) == ["login", "disable", "login_2fa"]
@@ -3,15 +3,18 @@ import pytest
 import pyotp
 from pages.auth_page import AuthPage
 from pages.profile_page import ProfilePage
+from utils.account_state import ON, OFF, AccountStateTracker
 from utils.logger import logger
 from utils.helpers import take_screenshot
 
+@pytest.mark.account_state(requires=ON, leaves=OFF)
 @pytest.mark.usefixtures("page")
 def test_disable_2fa_flow(
     auth_page: AuthPage,
     profile_page: ProfilePage,
     saved_twofa_secret: str,
     creds: tuple[str, str],
+    account_state: AccountStateTracker,
     base
 ):
     email, pwd = creds
@@ -29,20 +32,33 @@ def test_disable_2fa_flow(
     
     # 3. Проверка начального состояния (2FA включена)
     logger.info("Проверка начального состояния - 2FA должен быть включен")
-    assert profile_page.base.is_element_visible(ProfilePage.DISABLE_BTN), "Кнопка Disable должна быть видна при включенном 2FA"
-    assert profile_page.base.is_element_visible(ProfilePage.TWOFA_ENABLED_BLOCK), "Блок с включенным 2FA должен быть отображен"
+    state = profile_page.base.wait_for_snapshot(
+        {"disable_btn": ProfilePage.DISABLE_BTN, "enabled_block": ProfilePage.TWOFA_ENABLED_BLOCK},
+        lambda s: s["disable_btn"].visible and s["enabled_block"].visible,
+        timeout=3000,
+        step="2FA включена"
+    )
+    assert state["disable_btn"].visible, "Кнопка Disable должна быть видна при включенном 2FA"
+    assert state["enabled_block"].visible, "Блок с включенным 2FA должен быть отображен"
     logger.info("2FA действительно включен - кнопка Disable видна и блок с включенным 2FA отображен")
     
     # 4. Отключение 2FA
     code = pyotp.TOTP(secret).now()
     logger.info(f"Отключение 2FA с кодом: {code}")
     profile_page.disable_2fa(pwd, code)
+    account_state.set(False)
     take_screenshot(base.page, "after_disable_2fa")
     
     # 5. Проверка, что 2FA отключена (кнопка Enable видна и блок с выключенным 2FA отображен)
     logger.info("Проверка, что 2FA отключена")
-    assert profile_page.base.is_element_visible(ProfilePage.ENABLE_BTN), "Кнопка Enable должна быть видна после отключения 2FA"
-    assert profile_page.base.is_element_visible(ProfilePage.TWOFA_DISABLED_BLOCK), "Блок с выключенным 2FA должен быть отображен"
+    state = profile_page.base.wait_for_snapshot(
+        {"enable_btn": ProfilePage.ENABLE_BTN, "disabled_block": ProfilePage.TWOFA_DISABLED_BLOCK},
+        lambda s: s["enable_btn"].visible and s["disabled_block"].visible,
+        timeout=3000,
+        step="2FA отключена"
+    )
+    assert state["enable_btn"].visible, "Кнопка Enable должна быть видна после отключения 2FA"
+    assert state["disabled_block"].visible, "Блок с выключенным 2FA должен быть отображен"
     logger.info("2FA успешно отключена - кнопка Enable видна и блок с выключенным 2FA отображен")
     
     logger.info("=== END test_disable_2fa_flow ===")
\ No newline at end of file
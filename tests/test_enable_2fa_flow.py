@@ -3,14 +3,18 @@ import pytest
 import pyotp
 from pages.auth_page import AuthPage
 from pages.profile_page import ProfilePage
+from utils.account_state import ON, OFF, AccountStateTracker
 from utils.logger import logger
 from utils.helpers import take_screenshot
 
+@pytest.mark.emulation
+@pytest.mark.account_state(requires=OFF, leaves=ON)
 @pytest.mark.usefixtures("page")
 def test_enable_2fa_flow(
     auth_page: AuthPage,
     profile_page: ProfilePage,
     creds: tuple[str, str],
+    account_state: AccountStateTracker,
     base
 ):
     email, pwd = creds
@@ -43,22 +47,20 @@ def test_enable_2fa_flow(
     code = pyotp.TOTP(secret).now()
     logger.info(f"Подтверждение 2FA кодом: {code}")
     profile_page.confirm_enable_2fa(code)
+    # Состояние и секрет фиксируем сразу, чтобы не потерять их при падении проверок ниже
+    account_state.set(True, secret)
     take_screenshot(base.page, "after_confirm_enable")
     
     # 6. Проверка, что 2FA включена (кнопка Disable видна и блок с включенным 2FA отображен)
     logger.info("Проверка, что 2FA включена")
-    assert profile_page.base.is_element_visible(ProfilePage.DISABLE_BTN), "Кнопка Disable должна быть видна после включения 2FA"
-    assert profile_page.base.is_element_visible(ProfilePage.TWOFA_ENABLED_BLOCK), "Блок с включенным 2FA должен быть отображен"
+    state = profile_page.base.wait_for_snapshot(
+        {"disable_btn": ProfilePage.DISABLE_BTN, "enabled_block": ProfilePage.TWOFA_ENABLED_BLOCK},
+        lambda s: s["disable_btn"].visible and s["enabled_block"].visible,
+        timeout=3000,
+        step="2FA включена"
+    )
+    assert state["disable_btn"].visible, "Кнопка Disable должна быть видна после включения 2FA"
+    assert state["enabled_block"].visible, "Блок с включенным 2FA должен быть отображен"
     logger.info("2FA успешно включена - кнопка Disable видна и блок с включенным 2FA отображен")
     
-    # 7. Сохраняем секрет для последующих тестов
-    import os
-    path = os.path.join(os.getcwd(), "last_twofa_secret.txt")
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(secret)
-        logger.info(f"Секрет 2FA сохранен в {path}")
-    except Exception as e:
-        logger.warning(f"Не удалось сохранить секрет 2FA: {e}")
-    
     logger.info("=== END test_enable_2fa_flow ===")
\ No newline at end of file
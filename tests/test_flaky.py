@@ -0,0 +1,126 @@
+# tests/test_flaky.py
+# Перезапуск в gdx_flaky опирается на внутренний API pytest — эти тесты
+# проверяют его на зафиксированной в requirements.txt версии.
+
+import pytest
+from utils.flaky import OutcomeHistory
+
+pytest_plugins = ["pytester"]
+
+# Session-фикстура пишет в журнал запуск и закрытие «браузера», function-фикстура — каждый setup
+CONFTEST = """
+import pytest
+from utils.flaky import FlakyPlugin, OutcomeHistory
+
+def pytest_configure(config):
+    config.pluginmanager.register(
+        FlakyPlugin(OutcomeHistory("history.sqlite"), reruns=1, mode="{mode}"), "gdx_flaky"
+    )
+
+def log(event):
+    with open("events.log", "a") as f:
+        f.write(event + "\\n")
+
+@pytest.fixture(scope="session")
+def browser():
+    log("launch")
+    yield
+    log("close")
+
+@pytest.fixture
+def page(browser):
+    log("page")
+    yield
+    log("page closed")
+"""
+
+
+def events(pytester) -> list[str]:
+    return (pytester.path / "events.log").read_text().splitlines()
+
+
+@pytest.fixture
+def suite(pytester):
+    def make(mode: str = "exclude", **modules: str):
+        pytester.makeconftest(CONFTEST.format(mode=mode))
+        pytester.makepyfile(**modules)
+    return make
+
+
+def test_rerun_keeps_session_fixtures(pytester, suite):
+    # Упавший тест последний в модуле: повтор не должен закрыть браузер перед следующим модулем
+    suite(
+        test_a="""
+import os
+
+def test_flaky(page):
+    first = not os.path.exists("attempted")
+    open("attempted", "w").close()
+    assert not first
+""",
+        test_b="""
+def test_next(page):
+    pass
+""",
+    )
+    result = pytester.runpytest("-p", "no:cacheprovider")
+    outcomes = result.parseoutcomes()
+    assert outcomes.get("passed") == 2 and outcomes.get("rerun") == 1
+    assert events(pytester) == ["launch", "page", "page closed", "page", "page closed",
+                                "page", "page closed", "close"]
+    rows = OutcomeHistory(str(pytester.path / "history.sqlite"))._connect().execute(
+        "SELECT nodeid, outcome, attempts FROM outcomes ORDER BY nodeid").fetchall()
+    assert rows == [("test_a.py::test_flaky", "flaky", 2), ("test_b.py::test_next", "passed", 1)]
+
+
+def test_failed_setup_is_retried(pytester, suite):
+    suite(test_a="""
+import os, pytest
+
+@pytest.fixture
+def flaky_setup(page):
+    first = not os.path.exists("attempted")
+    open("attempted", "w").close()
+    assert not first
+
+def test_setup(flaky_setup):
+    pass
+""")
+    result = pytester.runpytest("-p", "no:cacheprovider")
+    outcomes = result.parseoutcomes()
+    assert outcomes.get("passed") == 1 and outcomes.get("rerun") == 1
+    assert events(pytester).count("launch") == 1
+
+
+def test_exhausted_reruns_fail(pytester, suite):
+    suite(test_a="""
+def test_broken(page):
+    assert False
+""")
+    result = pytester.runpytest("-p", "no:cacheprovider")
+    outcomes = result.parseoutcomes()
+    assert outcomes.get("failed") == 1 and outcomes.get("rerun") == 1
+    assert events(pytester).count("launch") == 1
+
+
+@pytest.mark.parametrize("mode, selected", [("exclude", "test_stable"), ("only", "test_quarantined")])
+def test_quarantine_modes(pytester, suite, mode, selected):
+    history = OutcomeHistory(str(pytester.path / "history.sqlite"))
+    for outcome in ("passed", "failed", "passed", "flaky"):
+        history.record("old", "test_a.py::test_quarantined", outcome, 1, 0.1)
+    suite(mode, test_a="""
+def test_quarantined(page):
+    assert False
+
+def test_stable(page):
+    pass
+""")
+    result = pytester.runpytest("-p", "no:cacheprovider", "-v")
+    outcomes = result.parseoutcomes()
+    assert outcomes.get("deselected") == 1
+    result.stdout.fnmatch_lines([f"*test_a.py::{selected}*"])
+    if mode == "only":
+        # Падение карантинного теста не блокирует прогон
+        assert outcomes.get("xfailed") == 1 and "failed" not in outcomes
+    else:
+        assert outcomes.get("passed") == 1
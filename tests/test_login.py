@@ -1,17 +1,18 @@
 import os
 import pytest
 from utils.helpers import take_screenshot
+from utils.account_state import OFF
 from utils.logger import logger
 
 
-def test_login_success(auth_page, base, page, creds):
+# Вход без 2FA: тест должен идти, пока 2FA выключена
+@pytest.mark.account_state(requires=OFF)
+def test_login_success(auth_page, page, creds):
     email, password = creds
     logger.info("=== Начало теста: test_login_success ===")
     try:
-        auth_page.go_to_sign_in()
-        auth_page.login(email, password)
-        base.click('button:has-text("Log in")')
-        # TODO: добавить проверку успешного входа
+        # Метод сам открывает /sign-in и ждёт личный кабинет после входа
+        auth_page.login_without_2fa(email, password)
     except Exception as e:
         take_screenshot(page, "login_failure")
         logger.error(f"Ошибка во время теста: {e}")
@@ -1,10 +1,15 @@
 # tests/test_login_api_response.py
 
 import pytest
+from utils.account_state import OFF
 from utils.logger import logger
 from utils.helpers import take_screenshot
 
-def test_login_api_response(auth_page, base, page, creds):
+# Вход без 2FA: тест должен идти, пока 2FA выключена. Шаг входа не восстанавливается
+# из контрольной точки при повторе — тесту нужен сам запрос /api/login
+@pytest.mark.account_state(requires=OFF)
+@pytest.mark.checkpoints(False)
+def test_login_api_response(auth_page, page, creds):
     """
     Проверяем HTTP-статус и тело JSON-ответа на POST https://godex.io/api/login,
     и убеждаемся, что после логина открывается личный кабинет.
@@ -12,21 +17,17 @@ def test_login_api_response(auth_page, base, page, creds):
     email, password = creds
     logger.info("=== Начало теста: test_login_api_response ===")
 
-    # 1. Переходим на страницу логина и вводим учётные данные
-    auth_page.go_to_sign_in()
-    auth_page.login(email, password)
-
-    # 2. Ловим запрос и ответ на /api/login
+    # 1. Входим через форму и ловим запрос и ответ на /api/login
     with page.expect_request(lambda req: req.method == "POST" and "/api/login" in req.url) as req_info, \
          page.expect_response(lambda resp: resp.request.method == "POST" and "/api/login" in resp.url) as resp_info:
-        base.click('button:has-text("Log in")')
+        auth_page.login_without_2fa(email, password)
 
     response = resp_info.value
     status = response.status
     logger.info(f"RESPONSE ← HTTP {status} на {response.url}")
     assert status == 200, f"Ожидали HTTP 200, получили {status}"
 
-    # 3. Разбираем JSON-ответ и проверяем токен
+    # 2. Разбираем JSON-ответ и проверяем токен
     try:
         body = response.json()
     except Exception:
@@ -40,7 +41,7 @@ def test_login_api_response(auth_page, base, page, creds):
     parts = token.split(".")
     assert len(parts) == 3, f"Неверный формат JWT‑токена: {token}"
 
-    # 4. UI-assertion: проверяем, что открылась страница личного кабинета
+    # 3. UI-assertion: проверяем, что открылась страница личного кабинета
     profile_locator = page.locator('h2.gdx-h2.account__title')
     profile_locator.wait_for(state='visible', timeout=10_000)
     title_text = profile_locator.text_content().strip()
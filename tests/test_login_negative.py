@@ -1,64 +1,75 @@
 # tests/test_login_negative.py
 
 import pytest
-from utils.helpers import take_screenshot, random_sleep
+from pages.auth_page import AuthPage
+from utils.helpers import take_screenshot
+from utils.login_cases import LoginCase, check_cases, ui_reason, ui_sample
 from utils.logger import logger
 
+FIELD_ALERT = "div.gdx-input-error-alert.gdx-alert.type-error"
+FORM_ALERT = "div.gdx-gray-card__form-res-alert.gdx-alert.type-error"
+
 NEGATIVE_CASES = [
-    pytest.param("", "", 
-                 "div.gdx-input-error-alert.gdx-alert.type-error", 
-                 "Required", id="empty_fields"),
-    pytest.param("not-an-email", "ValidPass123!",
-                 "div.gdx-gray-card__form-res-alert.gdx-alert.type-error",
-                 "Incorrect login or password", id="invalid_email"),
-    pytest.param("user@example.com", "wrongPass",
-                 "div.gdx-gray-card__form-res-alert.gdx-alert.type-error",
-                 "Incorrect login or password", id="wrong_password"),
-    pytest.param("user@example.com", "123",
-                 "div.gdx-gray-card__form-res-alert.gdx-alert.type-error",
-                 "Password must be at least", id="short_password"),
+    LoginCase("empty_fields", "", "", FIELD_ALERT, "Required"),
+    LoginCase("invalid_email", "not-an-email", "ValidPass123!", FORM_ALERT, "Incorrect login or password"),
+    LoginCase("wrong_password", "user@example.com", "wrongPass", FORM_ALERT, "Incorrect login or password"),
+    LoginCase("short_password", "user@example.com", "123", FORM_ALERT, "Password must be at least"),
 ]
 
-@pytest.mark.parametrize(
-    "email,password,container_selector,expected_text",
-    NEGATIVE_CASES
-)
-def test_login_negative(
-    auth_page, base, page, creds,
-    email, password, container_selector, expected_text
-):
-    logger.info(f"=== CASE {email!r} | {password!r} ===")
+
+@pytest.fixture(scope="session")
+def login_api_results():
+    """Ответы /api/login для всех кейсов — один параллельный пакет на прогон."""
+    return check_cases(NEGATIVE_CASES)
+
+
+@pytest.fixture(scope="session")
+def login_ui_sample() -> set[str]:
+    return ui_sample(case.id for case in NEGATIVE_CASES)
+
+
+@pytest.mark.parametrize("case", NEGATIVE_CASES, ids=lambda c: c.id)
+def test_login_negative_api(case: LoginCase, login_api_results):
+    result = login_api_results[case.id]
+    assert result.expected, (
+        f"Case [{case.email!r}|{case.password!r}]: ожидался статус "
+        f"{case.api_status[0]}–{case.api_status[1]}, получено {result}"
+    )
+
+
+@pytest.mark.parametrize("case", NEGATIVE_CASES, ids=lambda c: c.id)
+def test_login_negative(request, engine, case: LoginCase, login_api_results, login_ui_sample):
+    reason = ui_reason(case, login_api_results[case.id], login_ui_sample)
+    if reason is None:
+        pytest.skip("Кейс подтверждён на уровне API и не попал в UI-выборку")
+    logger.info(f"=== CASE {case.email!r} | {case.password!r} ({reason}) ===")
+
+    # Браузер поднимается только для кейсов, которые действительно повторяются в UI
+    auth_page: AuthPage = request.getfixturevalue("auth_page")
+    base, page = auth_page.base, auth_page.page
 
     # Сбрасываем форму каждый раз: переходим на /sign-in
     auth_page.go_to_sign_in()
-    base.wait_for_element('input[name="email"]')
-    random_sleep(0.5, 1.0)
 
     # Заполняем поля
-    base.fill_input('input[name="email"]', email)
-    base.fill_input('input[name="password"]', password)
+    base.fill_input(AuthPage.EMAIL_INPUT, case.email)
+    base.fill_input(AuthPage.PASSWORD_INPUT, case.password)
 
     # Кликаем «Log in» (и ждём /api/login, если отправляется)
-    if email or password:
+    if case.submits:
         with page.expect_response(
             lambda r: r.request.method == "POST" and "/api/login" in r.url
         ):
-            base.wait_and_click('button:has-text("Log in")')
+            base.click(AuthPage.LOGIN_BTN)
     else:
-        base.wait_and_click('button:has-text("Log in")')
-
-    # Пауза чтобы алерт отрисовался
-    random_sleep(1, 1)
+        base.click(AuthPage.LOGIN_BTN)
 
     # Проверяем, что появился нужный алерт
-    locator = page.locator(f"{container_selector}:has-text(\"{expected_text}\")")
-    try:
-        locator.wait_for(state="visible", timeout=5_000)
-    except Exception:
-        take_screenshot(page, f"neg_{email or 'empty'}")
+    alert = f"{case.alert_selector}:has-text(\"{case.expected_text}\")"
+    if not base.is_element_visible(alert, timeout=5_000):
+        take_screenshot(page, f"neg_{case.id}")
         pytest.fail(
-            f"Case [{email!r}|{password!r}]: не дождались ‘{expected_text}’"
+            f"Case [{case.email!r}|{case.password!r}]: не дождались ‘{case.expected_text}’"
         )
 
-    assert locator.is_visible()
-    logger.info(f"✅ CASE {email!r} | {password!r} — saw ‘{expected_text}’")
+    logger.info(f"✅ CASE {case.email!r} | {case.password!r} — saw ‘{case.expected_text}’")
@@ -1,8 +1,11 @@
 import pytest
 import pyotp
 from pages.auth_page import AuthPage
+from utils.account_state import ON
 from utils.logger import logger
 
+@pytest.mark.emulation
+@pytest.mark.account_state(requires=ON)
 @pytest.mark.usefixtures("page")
 def test_login_with_2fa(
     auth_page: AuthPage,
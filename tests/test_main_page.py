@@ -9,6 +9,7 @@ def test_main_page_navigation_works(main_page):
     auth_page = main_page.click_dashboard()
     assert "/sign-in" in auth_page.page.url
 
+@pytest.mark.emulation
 def test_exchange_flow(main_page):
     main_page.navigate_to_main()
     main_page.select_send_currency("BTC")
@@ -0,0 +1,257 @@
+# utils/account_state.py
+"""
+Модель состояния тестового аккаунта: 2FA выключена / включена + известный секрет.
+
+Тест объявляет, в каком состоянии ему нужен аккаунт и в каком он его оставит:
+
+    @pytest.mark.account_state(requires="2fa_off", leaves="2fa_on")
+
+Трекер помнит текущее состояние между тестами и прогонами (account_state.json
+рядом с last_twofa_secret.txt) и выполняет переход только когда состояние
+действительно не совпадает. Плагин переставляет тесты так, чтобы соседние
+переиспользовали состояние, а не включали и выключали 2FA по очереди. Порядок
+планируется внутри группы каждого движка (session-параметр engine), чтобы не
+перезапускать браузеры ради переключения 2FA.
+"""
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+import pyotp
+import pytest
+from playwright.sync_api import Browser, Page
+from utils import api_client
+from utils.logger import logger
+
+ON = "2fa_on"
+OFF = "2fa_off"
+STATE_FILE = "account_state.json"
+SECRET_FILE = "last_twofa_secret.txt"
+
+
+@dataclass
+class AccountState:
+    twofa: Optional[bool] = None   # None — состояние неизвестно
+    secret: str = ""
+
+    def satisfies(self, requirement: Optional[str]) -> bool:
+        if requirement == ON:
+            return self.twofa is True and bool(self.secret)
+        if requirement == OFF:
+            return self.twofa is False
+        return True
+
+
+def requirement(item) -> tuple[Optional[str], Optional[str]]:
+    """(requires, leaves) из маркера account_state; leaves по умолчанию равен requires."""
+    marker = item.get_closest_marker("account_state") if item is not None else None
+    if not marker:
+        return None, None
+    requires = marker.kwargs.get("requires")
+    return requires, marker.kwargs.get("leaves", requires)
+
+
+def plan_order(items: list, start: Optional[str]) -> list:
+    """
+    Жадный план: тесты без требований — первыми в исходном порядке, дальше
+    каждый раз берётся первый тест, которому подходит текущее состояние
+    (сохраняющие его — раньше меняющих), и только если таких нет — тест,
+    требующий переключения. Если состояние неизвестно, план начинается с
+    требования, которое нужно большинству оставшихся тестов.
+    """
+    free = [i for i in items if requirement(i)[0] is None]
+    pending = [i for i in items if requirement(i)[0] is not None]
+    ordered, state = list(free), start
+    while pending:
+        if state is None:
+            counts = Counter(requirement(i)[0] for i in pending)
+            state = max(counts, key=counts.get)
+        matching = [i for i in pending if requirement(i)[0] == state]
+        # Сначала тесты, которые состояние не меняют, затем меняющие
+        item = next((i for i in matching if requirement(i)[1] == state), matching[0] if matching else pending[0])
+        pending.remove(item)
+        ordered.append(item)
+        state = requirement(item)[1]
+    return ordered
+
+
+def end_state(items: list, start: Optional[str]) -> Optional[str]:
+    """Состояние аккаунта после выполнения тестов `items` в этом порядке."""
+    state = start
+    for item in items:
+        leaves = requirement(item)[1]
+        if leaves is not None:
+            state = leaves
+    return state
+
+
+def _engine(item) -> Optional[str]:
+    callspec = getattr(item, "callspec", None)
+    return callspec.params.get("engine") if callspec else None
+
+
+class AccountStateTracker:
+    """Текущее состояние аккаунта и минимальные переходы между состояниями."""
+
+    def __init__(self, state_file: str = STATE_FILE, secret_file: str = SECRET_FILE):
+        self.state_file = os.path.join(os.getcwd(), state_file)
+        self.secret_file = os.path.join(os.getcwd(), secret_file)
+        self.current = self._load()
+        # Требование следующего по плану теста — выставляет AccountStatePlugin
+        self.next_requirement: Optional[str] = None
+
+    def _load(self) -> AccountState:
+        secret = ""
+        if os.path.exists(self.secret_file):
+            with open(self.secret_file, "r", encoding="utf-8") as f:
+                secret = f.read().strip()
+        twofa = None
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    twofa = json.load(f).get("twofa")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Не удалось прочитать {self.state_file}: {e}")
+        return AccountState(twofa, secret)
+
+    def set(self, twofa: Optional[bool], secret: Optional[str] = None) -> None:
+        """Фиксирует новое состояние аккаунта (и секрет, если он сменился)."""
+        if secret is not None and secret != self.current.secret:
+            with open(self.secret_file, "w", encoding="utf-8") as f:
+                f.write(secret)
+            self.current.secret = secret
+            logger.info(f"2FA secret saved to {self.secret_file}")
+        self.current.twofa = twofa
+        with open(self.state_file, "w", encoding="utf-8") as f:
+            json.dump({"twofa": twofa}, f)
+        logger.info(f"Состояние аккаунта: 2FA={'неизвестно' if twofa is None else ('on' if twofa else 'off')}")
+
+    def mark_unknown(self) -> None:
+        self.set(None)
+
+    def ensure(self, wanted: Optional[str], browser: Browser, email: str, password: str) -> AccountState:
+        """Приводит аккаунт к состоянию `wanted`, если он ещё не в нём."""
+        if self.current.satisfies(wanted):
+            logger.info(f"Аккаунт уже в состоянии {wanted}, переход не нужен")
+            return self.current
+        if self.current.twofa is None:
+            self._in_new_page(browser, lambda page: self._probe(page, email, password))
+            if self.current.satisfies(wanted):
+                return self.current
+
+        logger.info(f"Переход состояния аккаунта -> {wanted}")
+        if wanted == ON:
+            self._in_new_page(browser, lambda page: self._enable(page, email, password))
+        else:
+            self._disable(browser, email, password)
+        return self.current
+
+    @staticmethod
+    def _in_new_page(browser: Browser, action) -> None:
+        # Переходы выполняются в отдельном контексте, чтобы не трогать сессию теста
+        context = browser.new_context()
+        try:
+            action(context.new_page())
+        finally:
+            context.close()
+
+    def _probe(self, page: Page, email: str, password: str) -> None:
+        """Определяет, включена ли 2FA, по реакции формы входа."""
+        from pages.auth_page import AuthPage
+        auth = AuthPage(page)
+        auth.base.open_url(auth.URL, timeout=60000)
+        auth.base.fill_input(auth.EMAIL_INPUT, email)
+        auth.base.fill_input(auth.PASSWORD_INPUT, password)
+        auth.base.click(auth.LOGIN_BTN)
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            if page.is_visible(auth.TWOFA_CONTAINER):
+                self.set(True)
+                return
+            if "/stats/transactions" in page.url:
+                self.set(False)
+                return
+            page.wait_for_timeout(250)
+        raise AssertionError(f"Не удалось определить состояние 2FA. Текущий URL: {page.url}")
+
+    def _enable(self, page: Page, email: str, password: str) -> None:
+        from pages.auth_page import AuthPage
+        from pages.profile_page import ProfilePage
+        AuthPage(page).login_without_2fa(email, password)
+        profile = ProfilePage(page)
+        profile.navigate_to()
+        secret = profile.enable_2fa()
+        profile.confirm_enable_2fa(pyotp.TOTP(secret).now())
+        self.set(True, secret)
+
+    def can_disable_via_api(self) -> bool:
+        return bool(os.getenv("USER_API_TOKEN") and self.current.secret)
+
+    def disable_via_api(self, password: str) -> None:
+        """Отключает 2FA через API — без браузера, поэтому годится для фоновой очистки."""
+        try:
+            api_client.disable_2fa_for_user(password, self.current.secret)
+        except Exception:
+            self.mark_unknown()
+            raise
+        self.set(False)
+
+    def _disable(self, browser: Browser, email: str, password: str) -> None:
+        secret = self.current.secret
+        if not secret:
+            raise AssertionError("2FA включена, но секрет неизвестен — отключить её невозможно")
+        if self.can_disable_via_api():
+            try:
+                self.disable_via_api(password)
+                return
+            except Exception as e:
+                logger.warning(f"Не удалось отключить 2FA через API, отключаем через UI: {e}")
+
+        def disable_via_ui(page: Page) -> None:
+            from pages.auth_page import AuthPage
+            from pages.profile_page import ProfilePage
+            AuthPage(page).login_with_2fa(email, password, secret)
+            profile = ProfilePage(page)
+            profile.navigate_to()
+            profile.disable_2fa(password, pyotp.TOTP(secret).now())
+            self.set(False)
+
+        self._in_new_page(browser, disable_via_ui)
+
+
+class AccountStatePlugin:
+    """pytest-плагин: порядок тестов по состоянию аккаунта и учёт следующего требования."""
+
+    def __init__(self, tracker: AccountStateTracker):
+        self.tracker = tracker
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, items) -> None:
+        state = self.tracker.current
+        start = None if state.twofa is None else (ON if state.twofa else OFF)
+        # Группы движков сохраняют исходный порядок, план строится внутри каждой
+        groups: dict[Optional[str], list] = {}
+        for item in items:
+            groups.setdefault(_engine(item), []).append(item)
+        ordered = []
+        for group in groups.values():
+            planned = plan_order(group, start)
+            start = end_state(planned, start)
+            ordered += planned
+        items[:] = ordered
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.tracker.next_requirement = requirement(nextitem)[0]
+        yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        rep = outcome.get_result()
+        requires, leaves = requirement(item)
+        # Упавший посреди перехода тест оставляет аккаунт в неизвестном состоянии
+        if rep.when == "call" and rep.failed and requires != leaves:
+            self.tracker.mark_unknown()
@@ -1,26 +1,75 @@
 import os
+from typing import Optional
 import requests
 import pyotp
+from requests.adapters import HTTPAdapter
+from utils.config import BASE_URL, API_BASE_URL
 
-def disable_2fa_for_user(password: str, secret: str) -> None:
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """Сессия с пулом keep-alive соединений для повторных запросов к API."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def login(
+    email: str,
+    password: str,
+    session: Optional[requests.Session] = None,
+    base_url: Optional[str] = None,
+    timeout: float = 30
+) -> requests.Response:
     """
-    Снимает 2FA у пользователя через API.
-    Ожидает в .env:
-      USER_API_TOKEN — JWT или Bearer-токен пользователя
+    POST /api/login с учётными данными. Ответ возвращается как есть,
+    статус проверяет вызывающая сторона.
+    """
+    http = session or requests
+    return http.post(
+        f"{base_url or BASE_URL}/api/login",
+        json={"email": email, "password": password},
+        timeout=timeout
+    )
+
+
+def disable_2fa(
+    password: str,
+    secret: str,
+    session: Optional[requests.Session] = None,
+    token: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: float = 30
+) -> requests.Response:
+    """
+    POST /api/v2/account/disable2fa с текущим TOTP-кодом из секрета.
+    Ответ возвращается как есть, статус проверяет вызывающая сторона.
     """
-    token = os.getenv("USER_API_TOKEN")
+    token = token or os.getenv("USER_API_TOKEN")
     if not token:
         raise RuntimeError("Не задан USER_API_TOKEN в окружении")
 
     # Генерируем текущий одноразовый код из секрета
     totp_code = pyotp.TOTP(secret).now()
 
-    resp = requests.post(
-        "https://api.godex.io/api/v2/account/disable2fa",
+    http = session or requests
+    return http.post(
+        f"{base_url or API_BASE_URL}/api/v2/account/disable2fa",
         headers={"Authorization": f"{token}"},
         json={
             "password": password,
             "time_password": totp_code
-        }
+        },
+        timeout=timeout
     )
+
+
+def disable_2fa_for_user(password: str, secret: str) -> None:
+    """
+    Снимает 2FA у пользователя через API.
+    Ожидает в .env:
+      USER_API_TOKEN — JWT или Bearer-токен пользователя
+    """
+    resp = disable_2fa(password, secret)
     resp.raise_for_status()
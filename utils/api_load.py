@@ -0,0 +1,196 @@
+# utils/api_load.py
+"""
+HTTP-нагрузка на эндпоинты аккаунта поверх utils.api_client.
+
+Режимы:
+  closed — `concurrency` потоков шлют запросы подряд, без пауз;
+  rate   — запросы стартуют с постоянной частотой `rate` в секунду, задержка
+           считается от запланированного момента старта, а не от фактического,
+           чтобы очередь на стороне клиента не занижала перцентили.
+
+Соединения переиспользуются: у каждого потока своя requests.Session с пулом
+keep-alive. Итог — p50/p95/p99/max по гистограмме и разбивка ошибок.
+
+Запуск:
+    python -m utils.api_load login --mode closed --concurrency 20 --duration 30
+    python -m utils.api_load login --mode rate --rate 50 --duration 60 --base-url http://localhost:8080
+
+Внимание: disable2fa меняет состояние аккаунта — успешен только первый запрос,
+гоняйте его против заглушки.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+import requests
+from utils import api_client
+from utils.logger import logger
+from utils.metrics import LatencyHistogram
+
+REPORTS_DIR = "reports"
+
+# Запрос: функция(session) -> Response
+Request = Callable[[requests.Session], requests.Response]
+
+
+class ApiLoadHarness:
+    """Гоняет один запрос в закрытом цикле или с постоянной частотой и собирает задержки."""
+
+    def __init__(self, request: Request, concurrency: int = 10, timeout: float = 30):
+        self.request = request
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.histogram = LatencyHistogram()
+        self.errors: dict[str, int] = {}
+        self.statuses: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = api_client.create_session(pool_size=1)
+        return session
+
+    def _call(self, scheduled: Optional[float] = None) -> None:
+        started = time.perf_counter()
+        error = None
+        status = None
+        try:
+            response = self.request(self._session())
+            status = response.status_code
+            if status >= 400:
+                error = f"HTTP {status}"
+        except requests.RequestException as e:
+            error = type(e).__name__
+        except Exception as e:
+            # Ошибка подготовки запроса (нет USER_API_TOKEN, неверный секрет TOTP) —
+            # тоже неудачный вызов, а не тихо упавший поток
+            error = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+        elapsed_ms = (time.perf_counter() - (scheduled or started)) * 1000
+        with self._lock:
+            self.histogram.record(elapsed_ms)
+            if status is not None:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+    def run_closed(self, duration: float, requests_total: Optional[int] = None) -> dict:
+        """Закрытый цикл: каждый поток шлёт следующий запрос сразу после ответа."""
+        deadline = time.perf_counter() + duration
+        remaining = [requests_total] if requests_total else None
+
+        def worker() -> None:
+            while time.perf_counter() < deadline:
+                if remaining is not None:
+                    with self._lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                self._call()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return self.report("closed", time.perf_counter() - started)
+
+    def run_constant_rate(self, rate: float, duration: float) -> dict:
+        """Открытый цикл: старт запросов по расписанию с частотой `rate` в секунду."""
+        if rate <= 0:
+            raise ValueError(f"Частота должна быть больше нуля, получено: {rate}")
+        interval = 1.0 / rate
+        started = time.perf_counter()
+        total = int(rate * duration)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for i in range(total):
+                scheduled = started + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._call, scheduled)
+        return self.report("rate", time.perf_counter() - started, target_rate=rate)
+
+    def report(self, mode: str, elapsed: float, **extra) -> dict:
+        total = self.histogram.count
+        failed = sum(self.errors.values())
+        return {
+            "mode": mode,
+            **extra,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_per_s": round(total / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "latency_ms": self.histogram.summary(),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "errors": self.errors,
+            "histogram": self.histogram.buckets(),
+        }
+
+
+def _targets(args) -> dict[str, Request]:
+    email, password = os.getenv("EMAIL", ""), os.getenv("PASSWORD", "")
+    secret = os.getenv("TWOFA_SECRET", "")
+    if not secret and os.path.exists("last_twofa_secret.txt"):
+        with open("last_twofa_secret.txt", "r", encoding="utf-8") as f:
+            secret = f.read().strip()
+    return {
+        "login": lambda s: api_client.login(email, password, session=s,
+                                            base_url=args.base_url, timeout=args.timeout),
+        "disable2fa": lambda s: api_client.disable_2fa(password, secret, session=s,
+                                                       base_url=args.api_base_url, timeout=args.timeout),
+    }
+
+
+def write_report(report: dict, endpoint: str, out_dir: str = REPORTS_DIR) -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    path = os.path.join(out_dir, f"api_load_{endpoint}_{timestamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"endpoint": endpoint, **report}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="HTTP-нагрузка на эндпоинты аккаунта")
+    parser.add_argument("endpoint", choices=["login", "disable2fa"])
+    parser.add_argument("--mode", choices=["closed", "rate"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=10, help="Число потоков")
+    parser.add_argument("--rate", type=float, default=10.0, help="Запросов в секунду (режим rate)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Длительность, сек")
+    parser.add_argument("--requests", type=int, help="Ограничение числа запросов (режим closed)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Таймаут одного запроса, сек")
+    parser.add_argument("--base-url", help="Адрес сайта для /api/login (по умолчанию BASE_URL)")
+    parser.add_argument("--api-base-url", help="Адрес API для disable2fa (по умолчанию API_BASE_URL)")
+    parser.add_argument("--out-dir", default=REPORTS_DIR)
+    args = parser.parse_args(argv)
+    if args.mode == "rate" and args.rate <= 0:
+        parser.error("--rate должен быть больше нуля")
+
+    harness = ApiLoadHarness(_targets(args)[args.endpoint], args.concurrency, args.timeout)
+    if args.mode == "rate":
+        report = harness.run_constant_rate(args.rate, args.duration)
+    else:
+        report = harness.run_closed(args.duration, args.requests)
+    path = write_report(report, args.endpoint, args.out_dir)
+
+    lat = report["latency_ms"]
+    logger.info(
+        f"{args.endpoint} [{args.mode}] n={report['requests']} {report['throughput_per_s']} rps, "
+        f"p50={lat.get('p50', '-')} p95={lat.get('p95', '-')} p99={lat.get('p99', '-')} "
+        f"max={lat.get('max', '-')} ms, ошибки={report['error_rate']:.1%} {report['errors']}. Отчёт: {path}"
+    )
+    if not report["requests"]:
+        logger.error("Не выполнено ни одного запроса")
+    return 1 if report["errors"] or not report["requests"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+# utils/asset_cache.py
+"""
+Общий дисковый кэш статики для всех контекстов браузера.
+
+Контексты не делят HTTP-кэш, поэтому каждый новый context заново качает JS,
+CSS, шрифты и иконки. Обработчик маршрута отдаёт неизменяемые ресурсы
+(хэш в имени файла, immutable или долгий max-age) с диска через
+route.fulfill, устаревшие записи перепроверяет по ETag/Last-Modified.
+HTML и запросы к API не перехватываются вовсе.
+
+Включается переменной ASSET_CACHE=1, размер ограничен ASSET_CACHE_MAX_MB,
+при переполнении вытесняются давно не использованные записи (LRU).
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+from playwright.sync_api import BrowserContext, Route, Request
+from utils.logger import logger
+
+ASSET_CACHE = os.getenv("ASSET_CACHE", "0") == "1"
+ASSET_CACHE_DIR = os.getenv("ASSET_CACHE_DIR", ".asset_cache")
+ASSET_CACHE_MAX_MB = int(os.getenv("ASSET_CACHE_MAX_MB", "200"))
+
+STATIC_TYPES = {"script", "stylesheet", "font", "image", "media"}
+STATIC_URL = re.compile(r"\.(?:m?js|css|woff2?|ttf|otf|eot|png|jpe?g|gif|svg|webp|avif|ico)(?:\?|$)", re.I)
+# Хэш сборки в имени файла: app.3f9a1c2b.js, chunk-5d41402abc4b.css
+HASHED_NAME = re.compile(r"[.\-_~][0-9a-f]{8,}[.\-_~]", re.I)
+MIN_MAX_AGE = 24 * 3600
+# Заголовки, которые нельзя отдавать вместе с уже распакованным телом
+DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def _cache_control(headers: dict) -> dict:
+    directives = {}
+    for part in headers.get("cache-control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name] = value.strip('"')
+    return directives
+
+
+def _max_age(directives: dict, default: int = 0) -> int:
+    """max-age в секундах; без директивы — default, некорректное значение — 0."""
+    value = directives.get("max-age")
+    if not value:
+        return default
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 0
+
+
+class StaticAssetCache:
+    """Дисковый LRU-кэш статических ресурсов, подключаемый к контексту через route."""
+
+    def __init__(self, directory: str = ASSET_CACHE_DIR, max_bytes: int = ASSET_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "revalidated": 0, "stored": 0, "misses": 0, "bytes_saved": 0}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                       url TEXT PRIMARY KEY, file TEXT, status INTEGER, headers TEXT, size INTEGER,
+                       etag TEXT, last_modified TEXT, stored_at REAL, max_age INTEGER,
+                       immutable INTEGER, last_access REAL)"""
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Индекс общий для всех воркеров, пишущих в один каталог
+        return sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=30)
+
+    def attach(self, context: BrowserContext) -> None:
+        """Перехватывает в контексте только URL, похожие на статику."""
+        context.route(STATIC_URL, self._handle)
+
+    # --- Работа с индексом ---
+
+    def _lookup(self, url: str) -> Optional[dict]:
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute("SELECT * FROM entries WHERE url = ?", (url,)).fetchone()
+        if row is None or not os.path.exists(row["file"]):
+            return None
+        return dict(row)
+
+    def _touch(self, url: str, **fields) -> None:
+        fields["last_access"] = time.time()
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        with self._connect() as db:
+            db.execute(f"UPDATE entries SET {assignments} WHERE url = ?", (*fields.values(), url))
+
+    def _store(self, url: str, status: int, headers: dict, body: bytes) -> None:
+        cc = _cache_control(headers)
+        path = os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest())
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+        stored = {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS}
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, path, status, json.dumps(stored), len(body), headers.get("etag"),
+                 headers.get("last-modified"), now, _max_age(cc),
+                 int("immutable" in cc or bool(HASHED_NAME.search(url))), now),
+            )
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._connect() as db:
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for url, path, size in db.execute(
+                "SELECT url, file, size FROM entries ORDER BY last_access"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    # --- Политика кэширования ---
+
+    @staticmethod
+    def _cacheable(url: str, status: int, headers: dict) -> bool:
+        cc = _cache_control(headers)
+        if status != 200 or "no-store" in cc or headers.get("vary", "").strip() == "*":
+            return False
+        max_age = _max_age(cc)
+        return "immutable" in cc or max_age >= MIN_MAX_AGE or bool(HASHED_NAME.search(url))
+
+    @staticmethod
+    def _fresh(entry: dict) -> bool:
+        return bool(entry["immutable"]) or entry["stored_at"] + entry["max_age"] > time.time()
+
+    def _fulfill_cached(self, route: Route, entry: dict) -> None:
+        with open(entry["file"], "rb") as f:
+            body = f.read()
+        route.fulfill(status=entry["status"], headers=json.loads(entry["headers"]), body=body)
+        with self._lock:
+            self.stats["bytes_saved"] += len(body)
+
+    def _handle(self, route: Route, request: Request) -> None:
+        if request.method != "GET" or request.resource_type not in STATIC_TYPES:
+            route.continue_()
+            return
+
+        url = request.url
+        entry = self._lookup(url)
+        if entry and self._fresh(entry):
+            self._fulfill_cached(route, entry)
+            self._touch(url)
+            with self._lock:
+                self.stats["hits"] += 1
+            return
+
+        headers = dict(request.headers)
+        if entry:
+            if entry["etag"]:
+                headers["if-none-match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["if-modified-since"] = entry["last_modified"]
+        try:
+            response = route.fetch(headers=headers)
+        except Exception as e:
+            logger.warning(f"Кэш статики: не удалось загрузить {url}: {e}")
+            if entry:
+                self._fulfill_cached(route, entry)
+            else:
+                route.abort()
+            return
+
+        if response.status == 304 and entry:
+            max_age = _max_age(_cache_control(response.headers), entry["max_age"])
+            self._fulfill_cached(route, entry)
+            self._touch(url, stored_at=time.time(), max_age=max_age)
+            with self._lock:
+                self.stats["revalidated"] += 1
+            return
+
+        body = response.body()
+        with self._lock:
+            self.stats["misses"] += 1
+        if self._cacheable(url, response.status, response.headers):
+            self._store(url, response.status, response.headers, body)
+            with self._lock:
+                self.stats["stored"] += 1
+        route.fulfill(
+            status=response.status,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in DROP_HEADERS},
+            body=body,
+        )
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"Кэш статики: попаданий {s['hits']}, перепроверено {s['revalidated']}, "
+            f"из сети {s['misses']} (сохранено {s['stored']}), "
+            f"сэкономлено {s['bytes_saved'] / 1024 / 1024:.1f} МБ"
+        )
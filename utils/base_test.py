@@ -1,13 +1,25 @@
 import random
 import os
+import time
 from dotenv import load_dotenv
 from datetime import datetime
-from typing import Optional, Union, Literal, Any, cast
+from typing import Optional, Union, Literal, Any, Callable, cast
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError, Locator
 from utils.logger import logger
 from utils.helpers import take_screenshot, random_sleep
+from utils.metrics import record_step
+from utils.readiness import Readiness, ResponseReady
+from utils.snapshot import SNAPSHOT_JS, ElementState, format_snapshot
+from utils.page_watcher import watcher_for
+from utils.page_weight import meter_for
+from utils import deadline
+from utils.coverage_index import covered
 
+# Длина отрезка ожидания, между отрезками проверяются сигналы PageWatcher
+WAIT_SLICE_MS = int(os.getenv("WAIT_SLICE_MS", "250"))
 
+
+@covered
 class BaseTest:
     """Утилиты для взаимодействия со страницей и повышения стабильности тестов."""
     
@@ -15,11 +27,54 @@ class BaseTest:
         self.page = page
         self.context = page.context
 
+    def budget(self, timeout: int, step: str) -> int:
+        """Таймаут шага: меньшее из собственного таймаута и остатка бюджета теста."""
+        return deadline.budget(timeout, step)
+
+    def check_budget(self, step: str) -> None:
+        """Прерывает тест, если ожидание на шаге `step` исчерпало бюджет."""
+        deadline.check(step)
+
+    def check_page(self, step: str) -> None:
+        """Прерывает тест, если наблюдатель страницы уже зафиксировал ошибку."""
+        watcher = watcher_for(self.page)
+        if watcher:
+            watcher.raise_if_violated(step)
+
+    def until(self, wait: Callable[[int], Any], timeout: int, step: str) -> Any:
+        """
+        Выполняет ожидание `wait(timeout_ms)` в пределах бюджета теста.
+
+        Если к странице подключён PageWatcher, ожидание идёт короткими отрезками
+        по WAIT_SLICE_MS: ошибка бэкенда или исключение на странице прерывает его
+        сразу, а не по истечении полного таймаута. Таймаут последнего отрезка
+        пробрасывается как PlaywrightTimeoutError.
+        """
+        timeout = self.budget(timeout, step)
+        watcher = watcher_for(self.page)
+        if watcher is None:
+            try:
+                return wait(timeout)
+            except PlaywrightTimeoutError:
+                self.check_budget(step)
+                raise
+        ends = time.monotonic() + timeout / 1000
+        while True:
+            watcher.raise_if_violated(step)
+            remaining = int((ends - time.monotonic()) * 1000)
+            try:
+                return wait(max(1, min(remaining, WAIT_SLICE_MS)))
+            except PlaywrightTimeoutError:
+                watcher.raise_if_violated(step)
+                if remaining <= WAIT_SLICE_MS:
+                    self.check_budget(step)
+                    raise
+
     def wait_for_element(self, selector: str, timeout: int = 5000) -> None:
         """Ожидает появления элемента на странице."""
         logger.info(f"Ожидание элемента: {selector}, таймаут={timeout}ms")
         try:
-            self.page.wait_for_selector(selector, timeout=timeout)
+            self.until(lambda t: self.page.wait_for_selector(selector, timeout=t), timeout, f"ожидание {selector}")
         except PlaywrightTimeoutError as e:
             logger.error(f"Элемент не найден: {selector}")
             take_screenshot(self.page, f"wait_failed_{selector}")
@@ -30,23 +85,25 @@ class BaseTest:
         self.wait_for_element(selector, timeout)
         logger.info(f"Клик по элементу: {selector}")
         locator = self.page.locator(selector)
-        locator.scroll_into_view_if_needed()
-        locator.click(force=force)
+        locator.scroll_into_view_if_needed(timeout=self.budget(timeout, f"клик {selector}"))
+        locator.click(force=force, timeout=self.budget(timeout, f"клик {selector}"))
 
     def fill_input(self, selector: str, value: str, timeout: int = 5000) -> None:
         """Заполняет текстовое поле значением."""
         self.wait_for_element(selector, timeout)
         logger.info(f"Заполнение поля {selector} значением '{value}'")
-        self.page.fill(selector, value)
+        self.page.fill(selector, value, timeout=self.budget(timeout, f"заполнение {selector}"))
 
     def open_url(
         self,
         url: str,
-        wait_until: Literal['commit', 'domcontentloaded', 'load'] = 'load',
-        timeout: int = 30000
+        wait_until: Literal['commit', 'domcontentloaded', 'load', 'networkidle'] = 'load',
+        timeout: int = 30000,
+        ready: Optional[Readiness] = None
     ) -> None:
         """
-        Открывает страницу с ретраями и улучшенной обработкой загрузки.
+        Открывает страницу. Если передан признак готовности `ready`, навигация
+        ждёт только его (goto завершается на commit), иначе — событие `wait_until`.
         """
         # Нормализация URL
         if not url.startswith(('http://', 'https://', 'chrome-extension')):
@@ -54,34 +111,66 @@ class BaseTest:
 
         if self.page.url != url:
             logger.info(f"Открытие URL: {url}")
+            meter = meter_for(self.page)
+            if meter:
+                # Resource Timing текущего документа пропадёт после навигации
+                meter.capture_timing()
+            timeout = self.budget(timeout, f"открытие {url}")
             try:
-                # Пробуем открыть страницу с базовым ожиданием
-                self.page.goto(url, wait_until="domcontentloaded", timeout=timeout)
-                logger.info(f"Страница загружена (DOM ready): {self.page.url}")
-                
-                # Дополнительно ждем полной загрузки ресурсов, но с обработкой таймаута
-                try:
-                    self.page.wait_for_load_state("load", timeout=10000)
-                    logger.info("Страница полностью загружена (load event)")
-                except TimeoutError:
-                    logger.warning("Таймаут ожидания полной загрузки, но DOM готов")
-                    
-                # Ждем появления body страницы как дополнительную проверку
-                try:
-                    self.page.wait_for_selector("body", timeout=5000)
-                    logger.info("Body страницы найден")
-                except TimeoutError:
-                    logger.warning("Таймаут ожидания body, но страница загружена")
-                    
+                if ready:
+                    self.wait_until_ready(
+                        ready,
+                        timeout=timeout,
+                        action=lambda: self.page.goto(url, wait_until="commit", timeout=timeout),
+                        step=f"open {url}"
+                    )
+                else:
+                    started = time.perf_counter()
+                    self.page.goto(url, wait_until=wait_until, timeout=timeout)
+                    self.check_page(f"open {url}")
+                    record_step(self.page, f"open {url}", (time.perf_counter() - started) * 1000)
+                    logger.info(f"Страница загружена ({wait_until}): {self.page.url}")
             except Exception as e:
+                if isinstance(e, PlaywrightTimeoutError):
+                    self.check_budget(f"открытие {url}")
                 logger.error(f"Не удалось открыть страницу {url}: {e}")
                 take_screenshot(self.page, "open_url_failed")
                 raise
 
+    def wait_until_ready(
+        self,
+        ready: Readiness,
+        timeout: int = 15000,
+        action: Optional[Callable[[], Any]] = None,
+        step: str = ""
+    ) -> None:
+        """Выполняет действие и ждёт признака готовности страницы, замеряя время."""
+        step = step or f"ready {ready}"
+        timeout = self.budget(timeout, step)
+        started = time.perf_counter()
+        try:
+            if isinstance(ready, ResponseReady):
+                # Ожидание ответа взводится до действия и не делится на отрезки
+                ready.run(self.page, action, timeout)
+                self.check_page(step)
+            else:
+                if action:
+                    action()
+                remaining = max(1, int(timeout - (time.perf_counter() - started) * 1000))
+                self.until(lambda t: ready.wait(self.page, t), remaining, step)
+        except PlaywrightTimeoutError as e:
+            self.check_budget(step)
+            self.check_page(step)
+            logger.error(f"Страница не готова за {timeout}ms: {ready}")
+            raise AssertionError(f"Страница не готова ({ready}) за {timeout}ms") from e
+        elapsed = (time.perf_counter() - started) * 1000
+        record_step(self.page, step, elapsed)
+        logger.info(f"Страница готова ({ready}) за {elapsed:.0f}ms")
+
     def is_element_visible(self, selector: str, timeout: int = 3000) -> bool:
         """Проверяет, виден ли элемент на странице."""
         try:
-            self.page.wait_for_selector(selector, timeout=timeout)
+            self.until(lambda t: self.page.wait_for_selector(selector, timeout=t), timeout, f"видимость {selector}")
             return self.page.is_visible(selector)
         except PlaywrightTimeoutError:
             return False
@@ -96,11 +185,19 @@ class BaseTest:
         self.wait_for_element(selector, timeout)
         return self.page.locator(selector).get_attribute(attribute) or ""
 
-    def wait_for_url(self, url_pattern: str, timeout: int = 10000) -> None:
+    def wait_for_url(
+        self,
+        url_pattern: str,
+        timeout: int = 10000,
+        wait_until: Literal['commit', 'domcontentloaded', 'load', 'networkidle'] = 'load'
+    ) -> None:
         """Ждет, пока URL не будет соответствовать паттерну."""
         logger.info(f"Ожидание URL по паттерну: {url_pattern}")
         try:
-            self.page.wait_for_url(url_pattern, timeout=timeout)
+            self.until(
+                lambda t: self.page.wait_for_url(url_pattern, wait_until=wait_until, timeout=t),
+                timeout, f"URL {url_pattern}"
+            )
             logger.info(f"URL соответствует паттерну: {self.page.url}")
         except PlaywrightTimeoutError as e:
             logger.error(f"URL не соответствует паттерну {url_pattern}")
@@ -117,7 +214,10 @@ class BaseTest:
         """Ждет, пока элемент исчезнет со страницы."""
         logger.info(f"Ожидание исчезновения элемента: {selector}")
         try:
-            self.page.wait_for_selector(selector, state="detached", timeout=timeout)
+            self.until(
+                lambda t: self.page.wait_for_selector(selector, state="detached", timeout=t),
+                timeout, f"исчезновение {selector}"
+            )
             logger.info(f"Элемент исчез: {selector}")
         except PlaywrightTimeoutError as e:
             logger.warning(f"Элемент не исчез за отведенное время: {selector}")
@@ -126,15 +226,64 @@ class BaseTest:
     def clear_input(self, selector: str, timeout: int = 5000) -> None:
         """Очищает текстовое поле."""
         self.wait_for_element(selector, timeout)
-        self.page.locator(selector).clear()
+        self.page.locator(selector).clear(timeout=self.budget(timeout, f"очистка {selector}"))
 
     def double_click(self, selector: str, timeout: int = 5000) -> None:
         """Двойной клик по элементу."""
         self.wait_for_element(selector, timeout)
         logger.info(f"Двойной клик по элементу: {selector}")
-        self.page.locator(selector).dblclick()
+        self.page.locator(selector).dblclick(timeout=self.budget(timeout, f"двойной клик {selector}"))
 
     def hover(self, selector: str, timeout: int = 5000) -> None:
         """Наведение курсора на элемент."""
         self.wait_for_element(selector, timeout)
-        self.page.locator(selector).hover()
\ No newline at end of file
+        self.page.locator(selector).hover(timeout=self.budget(timeout, f"наведение {selector}"))
+
+    def snapshot(self, selectors: dict[str, str], attributes: tuple[str, ...] = ()) -> dict[str, ElementState]:
+        """
+        Состояние всех именованных селекторов за один вызов evaluate:
+        количество, видимость, текст и атрибуты `attributes` первого видимого элемента.
+        """
+        raw = self.page.evaluate(SNAPSHOT_JS, {"selectors": selectors, "attributes": list(attributes)})
+        result = {}
+        for name, selector in selectors.items():
+            state = ElementState(**raw[name])
+            if state.error:
+                # Селектор не разобран JS-резолвером — дочитываем через locator
+                locator = self.page.locator(selector)
+                count = locator.count()
+                first = locator.first
+                state = ElementState(
+                    count=count,
+                    visible=count > 0 and first.is_visible(),
+                    text=(first.inner_text() if count else "").strip(),
+                    attrs={a: first.get_attribute(a) for a in attributes} if count else {},
+                )
+            result[name] = state
+        return result
+
+    def wait_for_snapshot(
+        self,
+        selectors: dict[str, str],
+        predicate: Callable[[dict[str, ElementState]], bool],
+        timeout: int = 5000,
+        attributes: tuple[str, ...] = (),
+        step: str = "снимок состояния",
+        interval: int = 100
+    ) -> dict[str, ElementState]:
+        """
+        Опрашивает снимок, пока `predicate` не станет истинным, и возвращает последний снимок.
+        По таймауту исключение не поднимается — проверки делает вызывающий код.
+        """
+        timeout = self.budget(timeout, step)
+        ends = time.monotonic() + timeout / 1000
+        while True:
+            self.check_page(step)
+            snap = self.snapshot(selectors, attributes)
+            if predicate(snap):
+                return snap
+            remaining = int((ends - time.monotonic()) * 1000)
+            if remaining <= 0:
+                logger.warning(f"Состояние не достигнуто за {timeout}ms ({step}):\n{format_snapshot(snap)}")
+                return snap
+            self.page.wait_for_timeout(min(interval, remaining))
@@ -0,0 +1,223 @@
+# utils/checkpoints.py
+"""
+Контрольные точки пользовательских сценариев.
+
+Метод page object с декоратором @checkpointed("name") после успешного
+выполнения сохраняет контрольную точку: storage_state контекста (cookies и
+localStorage), URL страницы, состояние аккаунта и возвращённое значение.
+
+При повторе теста (перезапуск из gdx_flaky) шаги, для которых есть
+действующая точка, не выполняются заново: в контекст возвращаются cookies и
+localStorage, страница открывается на сохранённом URL, а метод возвращает
+сохранённое значение. Так повтор сценария «вход → профиль → отключение 2FA»
+начинается сразу с профиля, без повторного входа. Если после восстановления
+стенд перенаправил на другую страницу (например, сессия истекла), точка
+удаляется и шаг выполняется как обычно.
+
+Тест с маркером @pytest.mark.checkpoints(False) точки записывает, но при
+повторе выполняет все шаги заново — например, если проверяет сам запрос входа.
+
+Точка действует, пока состояние аккаунта (2FA и её секрет) совпадает с
+записанным: при смене состояния точки аккаунта сбрасываются.
+
+Точки хранятся в памяти на время прогона. CHECKPOINT_FILE=<путь> сохраняет
+их в файл и загружает при старте — отладочный прогон теста продолжит с
+последней точки предыдущего. Файл содержит cookies сессии: не публикуйте его
+вместе с отчётами.
+"""
+import functools
+import hashlib
+import json
+import os
+import weakref
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+from playwright.sync_api import Page
+from utils.account_state import AccountState, AccountStateTracker
+from utils.logger import logger
+
+CHECKPOINT_FILE = os.getenv("CHECKPOINT_FILE", "")
+
+
+def account_key(state: AccountState) -> Optional[str]:
+    """Отпечаток состояния аккаунта; None, пока состояние неизвестно."""
+    if state.twofa is None:
+        return None
+    return f"{'on' if state.twofa else 'off'}:{hashlib.sha1(state.secret.encode()).hexdigest()[:12]}"
+
+
+@dataclass
+class Checkpoint:
+    name: str
+    url: str
+    storage_state: dict
+    account: Optional[str]
+    value: Any = None
+    ts: str = ""
+
+
+class CheckpointStore:
+    """Контрольные точки прогона по тестам; pytest-плагин."""
+
+    def __init__(self, tracker: AccountStateTracker, path: str = CHECKPOINT_FILE):
+        self.tracker = tracker
+        self.path = path
+        self.points: dict[str, dict[str, Checkpoint]] = {}
+        self.resumed: list[tuple[str, str]] = []
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось прочитать контрольные точки {self.path}: {e}")
+            return
+        self.points = {test: {key: Checkpoint(**cp) for key, cp in points.items()} for test, points in raw.items()}
+        logger.info(f"Загружены контрольные точки: {self.path}")
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({test: {key: asdict(cp) for key, cp in points.items()} for test, points in self.points.items()},
+                      f, ensure_ascii=False, indent=2)
+
+    def get(self, test: str, key: str) -> Optional[Checkpoint]:
+        """Точка шага, если она ещё действует для текущего состояния аккаунта."""
+        checkpoint = self.points.get(test, {}).get(key)
+        if checkpoint is None:
+            return None
+        current = account_key(self.tracker.current)
+        if current is None:
+            return None  # состояние неизвестно — проверить точку не с чем
+        if checkpoint.account != current:
+            logger.info(f"Контрольная точка {key} устарела: состояние аккаунта изменилось")
+            self.invalidate(test, key)
+            return None
+        return checkpoint
+
+    def put(self, test: str, key: str, checkpoint: Checkpoint) -> None:
+        self.points.setdefault(test, {})[key] = checkpoint
+        self._save()
+
+    def invalidate(self, test: str, key: Optional[str] = None) -> None:
+        """Удаляет точку шага или все точки теста."""
+        if key is None:
+            self.points.pop(test, None)
+        else:
+            self.points.get(test, {}).pop(key, None)
+        self._save()
+
+    # --- pytest-хуки ---
+
+    def pytest_runtest_logreport(self, report) -> None:
+        # Прошедшему тесту точки больше не нужны (файл для отладки их сохраняет)
+        if report.when == "call" and report.passed and not self.path:
+            self.points.pop(report.nodeid, None)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if self.resumed:
+            terminalreporter.section("Шаги, восстановленные из контрольных точек")
+            for test, key in self.resumed:
+                terminalreporter.line(f"{test}: {key}")
+
+
+class Journey:
+    """Сценарий одного теста на странице: счётчик шагов и режим возобновления."""
+
+    def __init__(self, page: Page, store: CheckpointStore, test: str, resume: bool):
+        self.page = page
+        self.store = store
+        self.test = test
+        self.resume = resume
+        self.counts: dict[str, int] = {}
+        self.depth = 0
+
+    def next_key(self, name: str) -> str:
+        # Один и тот же шаг может встречаться в сценарии несколько раз
+        self.counts[name] = self.counts.get(name, 0) + 1
+        return f"{name}#{self.counts[name]}"
+
+    def record(self, key: str, value: Any) -> None:
+        try:
+            json.dumps(value)
+        except TypeError:
+            logger.debug(f"Шаг {key} вернул несериализуемое значение — точка не сохраняется")
+            return
+        self.store.put(self.test, key, Checkpoint(
+            name=key,
+            url=self.page.url,
+            storage_state=self.page.context.storage_state(),
+            account=account_key(self.store.tracker.current),
+            value=value,
+            ts=datetime.now().isoformat(timespec="seconds"),
+        ))
+
+    def restore(self, key: str, checkpoint: Checkpoint) -> bool:
+        """Возвращает страницу в состояние точки; False — восстановить не удалось."""
+        from utils.base_test import BaseTest
+        context = self.page.context
+        context.clear_cookies()
+        context.add_cookies(checkpoint.storage_state.get("cookies", []))
+        base = BaseTest(self.page)
+        base.open_url(checkpoint.url, wait_until="domcontentloaded")
+        origin = "{0.scheme}://{0.netloc}".format(urlparse(self.page.url))
+        items = next((o["localStorage"] for o in checkpoint.storage_state.get("origins", [])
+                      if o["origin"] == origin), [])
+        if items:
+            self.page.evaluate(
+                "(items) => items.forEach(({name, value}) => localStorage.setItem(name, value))", items
+            )
+            self.page.reload(wait_until="domcontentloaded")
+        if urlparse(self.page.url).path.rstrip("/") != urlparse(checkpoint.url).path.rstrip("/"):
+            logger.warning(f"Контрольная точка {key} недействительна: открылся {self.page.url}")
+            self.store.invalidate(self.test, key)
+            return False
+        logger.info(f"Шаг {key} восстановлен из контрольной точки: {checkpoint.url}")
+        self.store.resumed.append((self.test, key))
+        return True
+
+
+_JOURNEYS: "weakref.WeakKeyDictionary[Page, Journey]" = weakref.WeakKeyDictionary()
+
+
+def start_journey(page: Page, store: CheckpointStore, test: str, resume: bool) -> Journey:
+    journey = Journey(page, store, test, resume)
+    _JOURNEYS[page] = journey
+    return journey
+
+
+def checkpointed(name: str) -> Callable:
+    """Декоратор метода page object: после шага сохраняется точка, при повторе шаг восстанавливается из неё."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            journey = _JOURNEYS.get(self.page)
+            if journey is None or journey.depth:
+                return func(self, *args, **kwargs)  # вне теста или вложенный шаг
+            key = journey.next_key(name)
+            checkpoint = journey.store.get(journey.test, key) if journey.resume else None
+            if checkpoint is not None and journey.restore(key, checkpoint):
+                return checkpoint.value
+            journey.depth += 1
+            try:
+                value = func(self, *args, **kwargs)
+            finally:
+                journey.depth -= 1
+            journey.record(key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def should_resume(item) -> bool:
+    """Возобновлять ли сценарий: повтор упавшего теста или отладка с файлом точек."""
+    marker = item.get_closest_marker("checkpoints")
+    if marker and marker.args and not marker.args[0]:
+        return False
+    return getattr(item, "execution_count", 1) > 1 or bool(CHECKPOINT_FILE)
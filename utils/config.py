@@ -0,0 +1,18 @@
+# utils/config.py
+import os
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Базовый адрес стенда: прод, staging или локальная заглушка
+BASE_URL = os.getenv("BASE_URL", "https://godex.io").rstrip("/")
+# Адрес API аккаунта (отключение 2FA и т.п.)
+API_BASE_URL = os.getenv("API_BASE_URL", "https://api.godex.io").rstrip("/")
+# Свои домены (вес страниц, правила page_watcher): хосты через запятую, поддомены
+# учитываются. По умолчанию — хосты BASE_URL (без www.) и API_BASE_URL
+FIRST_PARTY_HOSTS = [
+    h.strip().lower().lstrip(".") for h in os.getenv("FIRST_PARTY_HOSTS", "").split(",") if h.strip()
+] or sorted({
+    (urlparse(url).hostname or "").removeprefix("www.") for url in (BASE_URL, API_BASE_URL)
+} - {""})
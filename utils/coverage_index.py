@@ -0,0 +1,287 @@
+# utils/coverage_index.py
+"""
+Индекс покрытия селекторов: какие локаторы и методы page objects трогал каждый тест.
+
+Классы page objects и BaseTest помечаются декоратором @covered. Во время
+теста каждое обращение к константе-локатору (ENABLE_BTN, READY, URL...) и
+каждый вызов метода записывается как символ "ProfilePage.ENABLE_BTN" или
+"AuthPage.login_with_2fa". После прогона для каждого прошедшего теста в
+reports/.selector_index.json сохраняются его символы с отпечатками их кода
+(по AST, поэтому правка комментариев и форматирования отпечаток не меняет),
+отпечаток файла теста и общий отпечаток остального кода проекта (conftest,
+utils, модульный код вне помеченных классов).
+
+SELECT_AFFECTED=1 запускает только затронутые тесты: те, у которых изменился
+хотя бы один символ или файл теста, и тесты, которых ещё нет в индексе.
+Если изменился остальной код или индекса нет — выполняется полный прогон.
+"""
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import os
+import re
+from datetime import datetime
+from typing import Optional
+import pytest
+from utils.logger import logger
+
+INDEX_FILE = os.path.join("reports", ".selector_index.json")
+INDEX_VERSION = 1
+SELECT_AFFECTED = os.getenv("SELECT_AFFECTED", "0") == "1"
+# Суффикс группы, который pytest-xdist добавляет к nodeid в режиме loadgroup
+_XDIST_GROUP = re.compile(r"@[\w-]+$")
+
+_registry: dict[str, type] = {}
+_current: Optional[set] = None
+
+
+def _is_constant(name: str) -> bool:
+    return name.isupper() and not name.startswith("_")
+
+
+def _record(symbol: str) -> None:
+    if _current is not None:
+        _current.add(symbol)
+
+
+class _TrackedConstant:
+    """Дескриптор константы класса, отмечающий каждое обращение к ней."""
+
+    def __init__(self, value, symbol: str):
+        self.value = value
+        self.symbol = symbol
+
+    def __get__(self, instance, owner):
+        _record(self.symbol)
+        return self.value
+
+
+def _track_method(func, symbol: str):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _record(symbol)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def covered(cls: type) -> type:
+    """Декоратор класса: учитывать обращения к его локаторам и методам в индексе покрытия."""
+    name = cls.__name__
+    for attr, value in list(vars(cls).items()):
+        symbol = f"{name}.{attr}"
+        if _is_constant(attr):
+            setattr(cls, attr, _TrackedConstant(value, symbol))
+        elif isinstance(value, (staticmethod, classmethod)):
+            setattr(cls, attr, type(value)(_track_method(value.__func__, symbol)))
+        elif inspect.isfunction(value) and not (attr.startswith("__") and attr != "__init__"):
+            setattr(cls, attr, _track_method(value, symbol))
+    _registry[name] = cls
+    return cls
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _parse(path: str) -> ast.Module:
+    with open(path, "r", encoding="utf-8") as f:
+        return ast.parse(f.read(), filename=path)
+
+
+def _class_symbols(node: ast.ClassDef) -> dict[str, str]:
+    """Отпечатки констант и методов класса; константа учитывает константы, из которых собрана."""
+    constants, symbols = {}, {}
+    for stmt in node.body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols[f"{node.name}.{stmt.name}"] = _digest(ast.dump(stmt))
+        elif isinstance(stmt, ast.Assign):
+            for target in stmt.targets:
+                if isinstance(target, ast.Name) and _is_constant(target.id):
+                    refs = sorted({n.id for n in ast.walk(stmt.value) if isinstance(n, ast.Name)})
+                    constants[target.id] = (ast.dump(stmt.value), refs)
+
+    resolved: dict[str, str] = {}
+
+    def resolve(const: str) -> str:
+        if const not in resolved:
+            resolved[const] = ""  # защита от циклов
+            dump, refs = constants[const]
+            resolved[const] = _digest(dump, *(resolve(r) for r in refs if r in constants))
+        return resolved[const]
+
+    for const in constants:
+        symbols[f"{node.name}.{const}"] = resolve(const)
+    return symbols
+
+
+def _residual(tree: ast.Module, tracked: set[str]) -> str:
+    """Отпечаток модуля без тел помеченных классов — всё, что не покрыто символами."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef) and node.name in tracked:
+            node.body = [
+                s for s in node.body
+                if not isinstance(s, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Assign))
+            ]
+    return _digest(ast.dump(tree))
+
+
+class Fingerprint:
+    """Отпечатки текущего кода: символы помеченных классов, файлы тестов и остальной код."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.symbols: dict[str, str] = {}
+        self._files: dict[str, str] = {}
+        tracked_files: dict[str, set[str]] = {}
+        for name, cls in _registry.items():
+            tracked_files.setdefault(os.path.abspath(inspect.getsourcefile(cls)), set()).add(name)
+        for path, names in tracked_files.items():
+            tree = _parse(path)
+            for node in ast.walk(tree):
+                if isinstance(node, ast.ClassDef) and node.name in names:
+                    self.symbols.update(_class_symbols(node))
+
+        support = []
+        for path in _support_files(root):
+            rel = os.path.relpath(path, root)
+            support.append(f"{rel}:{_residual(_parse(path), tracked_files.get(path, set()))}")
+        self.support = _digest(*sorted(support))
+
+    def test_file(self, rel_path: str) -> str:
+        if rel_path not in self._files:
+            path = os.path.join(self.root, rel_path)
+            self._files[rel_path] = _digest(ast.dump(_parse(path))) if os.path.exists(path) else ""
+        return self._files[rel_path]
+
+
+def _is_test_file(path: str) -> bool:
+    return os.path.basename(path).startswith("test_")
+
+
+def _support_files(root: str) -> list[str]:
+    """Все модули проекта, кроме файлов тестов: один и тот же набор в любом процессе."""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith((".", "_")) and d not in ("venv", "reports")]
+        files.extend(
+            os.path.join(dirpath, f) for f in filenames if f.endswith(".py") and not _is_test_file(f)
+        )
+    return sorted(files)
+
+
+def _base_nodeid(nodeid: str) -> str:
+    return _XDIST_GROUP.sub("", nodeid)
+
+
+def load_index(path: str = INDEX_FILE) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Индекс покрытия не прочитан: {e}")
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def affected(index: dict, fingerprint: Fingerprint, nodeids: list[str]) -> Optional[set[str]]:
+    """Затронутые изменениями тесты; None — индекс устарел и нужен полный прогон."""
+    tests = index.get("tests", {})
+    if all(entry.get("support") != fingerprint.support for entry in tests.values()):
+        return None
+    selected = set()
+    for nodeid in nodeids:
+        entry = tests.get(nodeid)
+        if (
+            entry is None
+            or entry.get("support") != fingerprint.support
+            or entry["module"] != fingerprint.test_file(nodeid.split("::")[0])
+            or any(fingerprint.symbols.get(s) != h for s, h in entry["symbols"].items())
+        ):
+            selected.add(nodeid)
+    return selected
+
+
+class CoverageIndexPlugin:
+    """pytest-плагин: запись символов каждого теста, индекс и выбор затронутых тестов."""
+
+    def __init__(self, config, select: bool = SELECT_AFFECTED, path: str = INDEX_FILE):
+        self.config = config
+        self.root = str(config.rootpath)
+        self.select = select
+        self.path = path
+        self.covered: dict[str, list[str]] = {}
+        self.dropped: set[str] = set()
+        self._fingerprint: Optional[Fingerprint] = None
+
+    @property
+    def fingerprint(self) -> Fingerprint:
+        # Считается лениво: к этому моменту conftest уже импортировал page objects
+        if self._fingerprint is None:
+            self._fingerprint = Fingerprint(self.root)
+        return self._fingerprint
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection_modifyitems(self, config, items) -> None:
+        if not self.select:
+            return
+        index = load_index(self.path)
+        selected = affected(index, self.fingerprint, [i.nodeid for i in items]) if index else None
+        if selected is None:
+            logger.warning("Индекс покрытия отсутствует или устарел — выполняется полный прогон")
+            return
+        deselected = [i for i in items if i.nodeid not in selected]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [i for i in items if i.nodeid in selected]
+        logger.info(f"Затронуто изменениями тестов: {len(items)}, пропущено: {len(deselected)}")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        global _current
+        _current = set()
+        try:
+            yield
+        finally:
+            _current = None
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        rep = outcome.get_result()
+        if rep.when == "teardown" and _current is not None:
+            # user_properties передаются с воркеров xdist вместе с отчётом
+            rep.user_properties.append(("covered", sorted(_current)))
+
+    def pytest_runtest_logreport(self, report) -> None:
+        nodeid = _base_nodeid(report.nodeid)
+        if report.failed or (report.skipped and report.when != "teardown"):
+            # Покрытие упавшего или пропущенного теста неполное — в индекс не попадает
+            self.dropped.add(nodeid)
+        if report.when == "teardown":
+            symbols = dict(report.user_properties).get("covered")
+            if symbols is not None and nodeid not in self.dropped:
+                self.covered[nodeid] = symbols
+
+    def pytest_sessionfinish(self, session) -> None:
+        if hasattr(self.config, "workerinput") or not (self.covered or self.dropped):
+            return
+        fingerprint = self.fingerprint
+        index = load_index(self.path) or {"version": INDEX_VERSION, "tests": {}}
+        tests = index["tests"]
+        for nodeid in self.dropped:
+            tests.pop(nodeid, None)
+        for nodeid, symbols in self.covered.items():
+            tests[nodeid] = {
+                "symbols": {s: fingerprint.symbols.get(s, "") for s in symbols},
+                "module": fingerprint.test_file(nodeid.split("::")[0]),
+                "support": fingerprint.support,
+            }
+        index["updated"] = datetime.now().isoformat(timespec="seconds")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+        logger.info(f"Индекс покрытия обновлён: {len(self.covered)} тестов, {self.path}")
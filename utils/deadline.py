@@ -0,0 +1,110 @@
+# utils/deadline.py
+"""
+Бюджет времени на тест и на фикстуру.
+
+Каждое ожидание в BaseTest и page objects берёт меньшее из своего таймаута
+и остатка бюджета. Когда бюджет исчерпан, тест прерывается ошибкой
+"бюджет исчерпан на шаге X" вместо цепочки из таймаутов подряд.
+
+Бюджет тела теста по умолчанию — TEST_BUDGET_MS, setup и teardown фикстур
+получают свой бюджет FIXTURE_BUDGET_MS. Для отдельного теста их можно задать
+маркером @pytest.mark.budget(ms, setup=ms, teardown=ms).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import pytest
+
+TEST_BUDGET_MS = int(os.getenv("TEST_BUDGET_MS", "180000"))
+FIXTURE_BUDGET_MS = int(os.getenv("FIXTURE_BUDGET_MS", "120000"))
+# Меньше этого остатка ожидание не запускается — оно всё равно не успеет
+MIN_WAIT_MS = 50
+
+_local = threading.local()
+
+
+class BudgetExhausted(AssertionError):
+    """Бюджет времени теста или фикстуры исчерпан."""
+
+
+class Deadline:
+    def __init__(self, budget_ms: int, name: str):
+        self.budget_ms = budget_ms
+        self.name = name
+        self.expires = time.monotonic() + budget_ms / 1000
+
+    def remaining_ms(self) -> float:
+        return (self.expires - time.monotonic()) * 1000
+
+
+def _stack() -> list[Deadline]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current() -> Optional[Deadline]:
+    """Ближайший к истечению активный бюджет."""
+    stack = _stack()
+    return min(stack, key=lambda d: d.expires) if stack else None
+
+
+@contextmanager
+def deadline(budget_ms: int, name: str) -> Iterator[Deadline]:
+    """Активирует бюджет на время блока; вложенные бюджеты не продлевают внешние."""
+    d = Deadline(budget_ms, name)
+    _stack().append(d)
+    try:
+        yield d
+    finally:
+        _stack().remove(d)
+
+
+def exhausted_error(d: Deadline, step: str) -> BudgetExhausted:
+    return BudgetExhausted(f"Бюджет '{d.name}' ({d.budget_ms}ms) исчерпан на шаге: {step}")
+
+
+def budget(timeout: float, step: str) -> int:
+    """Таймаут ожидания с учётом остатка бюджета; если бюджет исчерпан — BudgetExhausted."""
+    d = current()
+    if d is None:
+        return int(timeout)
+    remaining = d.remaining_ms()
+    if remaining < MIN_WAIT_MS:
+        raise exhausted_error(d, step)
+    return int(min(timeout, remaining))
+
+
+def check(step: str) -> None:
+    """Поднимает BudgetExhausted, если ожидание на шаге `step` съело остаток бюджета."""
+    d = current()
+    if d is not None and d.remaining_ms() < MIN_WAIT_MS:
+        raise exhausted_error(d, step)
+
+
+class DeadlinePlugin:
+    """pytest-плагин: отдельный бюджет на setup, тело теста и teardown."""
+
+    def _budget(self, item, phase: str) -> int:
+        marker = item.get_closest_marker("budget")
+        if phase == "call":
+            return int(marker.args[0]) if marker and marker.args else TEST_BUDGET_MS
+        return int(marker.kwargs.get(phase, FIXTURE_BUDGET_MS)) if marker else FIXTURE_BUDGET_MS
+
+    def _wrap(self, item, phase: str):
+        with deadline(self._budget(item, phase), f"{item.name} [{phase}]"):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        yield from self._wrap(item, "setup")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        yield from self._wrap(item, "call")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        yield from self._wrap(item, "teardown")
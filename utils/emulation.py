@@ -0,0 +1,163 @@
+# utils/emulation.py
+"""
+Профили эмуляции сети и CPU для замеров пользовательских сценариев.
+
+Профиль применяется к каждой странице контекста через CDP:
+Network.emulateNetworkConditions и Emulation.setCPUThrottlingRate, поэтому
+эмуляция доступна только в Chromium. Тесты с маркером
+@pytest.mark.emulation параметризуются профилями из EMULATION_PROFILES
+(через запятую, например "none,slow-3g,mid-tier-mobile"); без переменной
+тесты выполняются как обычно.
+
+Длительности шагов (login_with_2fa, enable_2fa, navigate_to_main и др.)
+собираются по профилям и сохраняются в reports/emulation_<ts>.json.
+
+Чтобы замеры не зависели от внешнего стенда, BASE_URL можно направить на
+локальную замену, а REPLAY_HAR=<файл.har> отдаёт ответы из записанного HAR
+(RECORD_HAR=1 записывает его заново). Ответы из HAR отдаёт маршрутизатор
+Playwright, до сети они не доходят, поэтому к ним применяется только
+замедление CPU; сетевой профиль действует на запросы к локальной замене.
+"""
+import json
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import pytest
+from playwright.sync_api import BrowserContext, Page
+from utils.logger import logger
+from utils.metrics import page_steps, summarize
+
+EMULATION_PROFILES = [p.strip() for p in os.getenv("EMULATION_PROFILES", "").split(",") if p.strip()]
+REPLAY_HAR = os.getenv("REPLAY_HAR", "")
+RECORD_HAR = os.getenv("RECORD_HAR", "0") == "1"
+REPORTS_DIR = "reports"
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    latency_ms: float = 0
+    download_kbps: float = -1      # -1 — без ограничения
+    upload_kbps: float = -1
+    cpu_rate: float = 1            # во сколько раз замедлить CPU
+
+    @property
+    def throttles_network(self) -> bool:
+        return self.latency_ms > 0 or self.download_kbps >= 0 or self.upload_kbps >= 0
+
+
+# Значения сети совпадают с пресетами DevTools
+PROFILES = {
+    p.name: p for p in (
+        Profile("none"),
+        Profile("fast-3g", latency_ms=562.5, download_kbps=1440, upload_kbps=675),
+        Profile("slow-3g", latency_ms=2000, download_kbps=400, upload_kbps=400),
+        Profile("mid-tier-mobile", latency_ms=562.5, download_kbps=1440, upload_kbps=675, cpu_rate=4),
+        Profile("low-end-mobile", latency_ms=2000, download_kbps=400, upload_kbps=400, cpu_rate=6),
+        Profile("cpu-4x", cpu_rate=4),
+    )
+}
+
+
+def get_profile(name: str) -> Profile:
+    if name not in PROFILES:
+        raise pytest.UsageError(f"Неизвестный профиль эмуляции '{name}', доступны: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def apply_to_page(page: Page, profile: Profile) -> None:
+    """Включает профиль для страницы через CDP-сессию."""
+    session = page.context.new_cdp_session(page)
+    if profile.throttles_network:
+        session.send("Network.enable")
+        session.send("Network.emulateNetworkConditions", {
+            "offline": False,
+            "latency": profile.latency_ms,
+            # CDP ожидает байты в секунду
+            "downloadThroughput": profile.download_kbps * 1024 / 8 if profile.download_kbps >= 0 else -1,
+            "uploadThroughput": profile.upload_kbps * 1024 / 8 if profile.upload_kbps >= 0 else -1,
+        })
+    if profile.cpu_rate > 1:
+        session.send("Emulation.setCPUThrottlingRate", {"rate": profile.cpu_rate})
+
+
+def apply_to_context(context: BrowserContext, profile: Profile) -> None:
+    """Применяет профиль ко всем страницам контекста, включая открытые позже."""
+    if profile.name == "none":
+        return
+    if context.browser is None or context.browser.browser_type.name != "chromium":
+        pytest.skip(f"Профиль эмуляции {profile.name} доступен только в Chromium")
+    context.on("page", lambda page: apply_to_page(page, profile))
+    for page in context.pages:
+        apply_to_page(page, profile)
+    logger.info(f"Профиль эмуляции: {profile}")
+
+
+def attach_har(context: BrowserContext, path: str = REPLAY_HAR, record: bool = RECORD_HAR) -> None:
+    """Отдаёт ответы из HAR (или записывает его при RECORD_HAR=1) вместо обращения к стенду."""
+    if not path:
+        return
+    context.route_from_har(path, update=record, not_found="fallback" if record else "abort")
+    logger.info(f"{'Запись' if record else 'Воспроизведение'} HAR: {path}")
+
+
+def profile_of(item) -> Optional[str]:
+    callspec = getattr(item, "callspec", None)
+    return callspec.params.get("emulation") if callspec else None
+
+
+class EmulationPlugin:
+    """pytest-плагин: параметризация по профилям и сводка длительностей шагов по профилям."""
+
+    def __init__(self, profiles: list[str] = EMULATION_PROFILES):
+        for name in profiles:
+            get_profile(name)
+        self.profiles = profiles
+        self.steps: dict[str, dict[str, list[float]]] = defaultdict(lambda: defaultdict(list))
+
+    def pytest_generate_tests(self, metafunc) -> None:
+        if self.profiles and metafunc.definition.get_closest_marker("emulation"):
+            metafunc.parametrize("emulation", self.profiles, indirect=True)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        rep = outcome.get_result()
+        page = item.funcargs.get("page")
+        profile = profile_of(item)
+        if rep.when == "call" and profile and page is not None:
+            # user_properties передаются с воркеров xdist вместе с отчётом
+            rep.user_properties += [("emulation", profile), ("steps", page_steps(page))]
+
+    def pytest_runtest_logreport(self, report) -> None:
+        props = dict(report.user_properties)
+        profile = props.get("emulation")
+        if report.when != "call" or not report.passed or not profile:
+            return
+        for step in props.get("steps", []):
+            self.steps[profile][step["step"]].append(step["ms"])
+
+    def pytest_sessionfinish(self, session) -> None:
+        if hasattr(session.config, "workerinput") or not self.steps:
+            return
+        report = {
+            profile: {step: summarize(values) for step, values in sorted(steps.items())}
+            for profile, steps in self.steps.items()
+        }
+        os.makedirs(REPORTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        path = os.path.join(REPORTS_DIR, f"emulation_{timestamp}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Длительности шагов по профилям эмуляции: {path}")
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if not self.steps:
+            return
+        terminalreporter.section("Шаги по профилям эмуляции (p50 / p95, ms)")
+        for profile, steps in self.steps.items():
+            for step, values in sorted(steps.items()):
+                s = summarize(values)
+                terminalreporter.line(f"{profile:<16} {step:<28} {s['p50']:>9} / {s['p95']:<9} (n={s['count']})")
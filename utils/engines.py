@@ -0,0 +1,135 @@
+# utils/engines.py
+"""
+Матрица браузерных движков: Chromium, Firefox и WebKit в одном прогоне.
+
+Каждый тест, использующий браузер, параметризуется движками из BROWSERS
+(через запятую, по умолчанию chromium). Браузер каждого движка запускается
+один раз на воркер, тесты получают маркер xdist_group с именем движка, так что
+
+    pytest -n 3 --dist loadgroup
+
+отдаёт каждый движок своему воркеру, и движки идут параллельно.
+
+Исключение — тесты, зависящие от состояния 2FA общего аккаунта (маркер
+account_state или фикстуры трекера состояния): состояние одно на всех, и
+трекер живёт в одном процессе, поэтому такие тесты всех движков собираются в
+одну группу "account" и идут последовательно на одном воркере. Остальные
+тесты, в том числе входящие под общими учётными данными (creds), остаются в
+группах своих движков. Время матрицы — максимум из самого медленного движка
+и группы "account".
+Тесты, меняющие состояние аккаунта (маркер account_state, где leaves отличается
+от requires), выполняются только на первом движке из BROWSERS.
+
+Без DISPLAY браузеры запускаются headless; HEADLESS=0/1 и SLOW_MO задают
+режим явно.
+"""
+import os
+from collections import defaultdict
+from typing import Optional
+import pytest
+from playwright.sync_api import Browser, Playwright
+from pytest_html import extras
+from utils.account_state import requirement
+
+ENGINES = ("chromium", "firefox", "webkit")
+BROWSERS = [b.strip() for b in os.getenv("BROWSERS", "chromium").split(",") if b.strip()]
+HEADLESS = os.getenv("HEADLESS", "0" if os.getenv("DISPLAY") else "1") == "1"
+SLOW_MO = int(os.getenv("SLOW_MO", "0" if HEADLESS else "50"))
+ACCOUNT_GROUP = "account"
+# Фикстуры, читающие или меняющие состояние аккаунта через трекер
+ACCOUNT_FIXTURES = {"account_state", "setup_2fa", "saved_twofa_secret"}
+
+
+def launch(pw: Playwright, engine: str) -> Browser:
+    """Запускает браузер движка `engine` в режиме из HEADLESS/SLOW_MO."""
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный движок '{engine}', доступны: {', '.join(ENGINES)}")
+    return getattr(pw, engine).launch(headless=HEADLESS, slow_mo=SLOW_MO)
+
+
+def uses_account_state(item) -> bool:
+    """Зависит ли тест от состояния 2FA общего аккаунта."""
+    return requirement(item)[0] is not None or bool(ACCOUNT_FIXTURES & set(item.fixturenames))
+
+
+def engine_of(item) -> Optional[str]:
+    callspec = getattr(item, "callspec", None)
+    return callspec.params.get("engine") if callspec else None
+
+
+class EngineMatrixPlugin:
+    """pytest-плагин: параметризация по движкам, группы xdist и сводка по движкам."""
+
+    def __init__(self, engines: list[str] = BROWSERS):
+        unknown = [e for e in engines if e not in ENGINES]
+        if unknown:
+            raise pytest.UsageError(f"BROWSERS: неизвестные движки {unknown}, доступны: {', '.join(ENGINES)}")
+        self.engines = engines
+        self.results: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def pytest_generate_tests(self, metafunc) -> None:
+        # "engine" есть в замыкании любого теста с браузером, а тесты, получающие
+        # браузер лениво через getfixturevalue, запрашивают его напрямую
+        if "engine" in metafunc.fixturenames:
+            # session-параметр: pytest группирует тесты по движку и держит один браузер на движок
+            metafunc.parametrize("engine", self.engines, indirect=True, scope="session")
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection_modifyitems(self, config, items) -> None:
+        primary = self.engines[0]
+        selected, deselected = [], []
+        for item in items:
+            engine = engine_of(item)
+            requires, leaves = requirement(item)
+            if engine and engine != primary and requires != leaves:
+                deselected.append(item)
+                continue
+            if engine:
+                group = ACCOUNT_GROUP if uses_account_state(item) else engine
+                item.add_marker(pytest.mark.xdist_group(group))
+            selected.append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        engine = engine_of(item)
+        if engine:
+            # user_properties передаются с воркеров xdist вместе с отчётом
+            outcome.get_result().user_properties.append(("engine", engine))
+
+    def pytest_runtest_logreport(self, report) -> None:
+        engine = dict(report.user_properties).get("engine")
+        if not engine:
+            return
+        if report.when == "call" or (report.when == "setup" and not report.passed):
+            outcome = "xfailed" if hasattr(report, "wasxfail") else report.outcome
+            self.results[engine][outcome] += 1
+
+    def _summary_lines(self) -> list[str]:
+        return [
+            f"{engine}: " + ", ".join(f"{k} {v}" for k, v in sorted(self.results[engine].items()))
+            for engine in self.engines if engine in self.results
+        ]
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if len(self.engines) > 1 and self.results:
+            terminalreporter.section("Итоги по движкам")
+            for line in self._summary_lines():
+                terminalreporter.line(line)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_html_results_summary(self, prefix, summary, postfix):
+        if self.results:
+            rows = "".join(f"<li>{line}</li>" for line in self._summary_lines())
+            prefix.extend([extras.html(f"<h2>Движки</h2><ul>{rows}</ul>")])
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_html_results_table_header(self, cells):
+        cells.insert(1, "<th>Движок</th>")
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_html_results_table_row(self, report, cells):
+        cells.insert(1, f"<td>{dict(report.user_properties).get('engine', '')}</td>")
@@ -0,0 +1,235 @@
+# utils/exchange_matrix.py
+"""
+Матричный прогон формы обмена.
+
+Список валютных пар с суммами раздаётся пулу вкладок одного браузера, которые
+работают параллельно. Синхронный API Playwright привязан к потоку и не может
+вести несколько вкладок одновременно, поэтому прогон использует async API:
+один драйвер и один Chromium на весь пул, вкладки — корутины. Шаги формы
+повторяют MainPage и используют его локаторы. Котировка считается снятой,
+когда в поле "You Get" появилось новое число. Для каждой пары фиксируется котировка "You Get" и время ответа
+запроса курса. Результат прогона — одна таблица (CSV + JSON) в reports/.
+
+Запуск:
+    python -m utils.exchange_matrix BTC:USDT:1 ETH:BTC:0.5 --workers 4
+    python -m utils.exchange_matrix --pairs-file pairs.csv
+"""
+import argparse
+import csv
+import json
+import asyncio
+import os
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Optional
+from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeoutError
+from pages.main_page import MainPage
+from utils.logger import logger
+
+REPORTS_DIR = "reports"
+# Подстрока URL запроса, который возвращает курс для выбранной пары
+RATE_API = os.getenv("EXCHANGE_RATE_API", "/api/v1/info")
+
+
+@dataclass
+class ExchangeCase:
+    send: str
+    receive: str
+    amount: str
+
+
+@dataclass
+class ExchangeResult:
+    send: str
+    receive: str
+    amount: str
+    quote: str = ""
+    rate_status: Optional[int] = None
+    rate_ms: Optional[float] = None
+    total_ms: float = 0.0
+    worker: int = 0
+    error: str = ""
+    ok: bool = False
+
+
+def parse_case(spec: str) -> ExchangeCase:
+    """Разбирает строку вида SEND:RECEIVE:AMOUNT."""
+    parts = [p.strip() for p in spec.split(":")]
+    if len(parts) != 3 or not all(parts):
+        raise ValueError(f"Ожидался формат SEND:RECEIVE:AMOUNT, получено: {spec!r}")
+    return ExchangeCase(*parts)
+
+
+def load_cases(path: str) -> list[ExchangeCase]:
+    """Читает пары из CSV с колонками send,receive,amount."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [ExchangeCase(row["send"], row["receive"], row["amount"]) for row in csv.DictReader(f)]
+
+
+QUOTE_JS = """
+([selector, before]) => {
+  const el = document.querySelector(selector);
+  const value = el ? el.value.trim() : "";
+  return value !== before && /^\\d+(\\.\\d+)?$/.test(value.replace(/[\\s,]/g, ""));
+}
+"""
+
+
+async def _rate_ms(response) -> Optional[float]:
+    """Время ответа запроса курса по данным Resource Timing самого браузера."""
+    try:
+        # До конца загрузки тела responseEnd ещё -1
+        await response.finished()
+    except Exception:
+        return None
+    timing = response.request.timing
+    if timing.get("responseEnd", -1) > 0 and timing.get("requestStart", -1) >= 0:
+        return round(timing["responseEnd"] - timing["requestStart"], 1)
+    return None
+
+
+async def _select_currency(page: Page, selector: str, currency: str, timeout: int) -> None:
+    # Те же шаги, что в MainPage.select_*_currency: клик, ввод кода монеты, Enter
+    await page.click(selector, timeout=timeout)
+    await page.fill(selector, currency, timeout=timeout)
+    await page.press(selector, "Enter", timeout=timeout)
+
+
+async def quote_pair(page: Page, case: ExchangeCase, timeout: int = 15000) -> ExchangeResult:
+    """Заполняет форму обмена для одной пары и снимает котировку."""
+    result = ExchangeResult(case.send, case.receive, case.amount)
+    started = time.perf_counter()
+    try:
+        await _select_currency(page, MainPage.SEND_INPUT, case.send, timeout)
+        await page.fill(MainPage.SEND_INPUT, case.amount, timeout=timeout)
+        before = (await page.input_value(MainPage.RECEIVE_INPUT, timeout=timeout)).strip()
+        # Курс запрашивается после выбора второй монеты
+        async with page.expect_response(lambda r: RATE_API in r.url, timeout=timeout) as resp_info:
+            await _select_currency(page, MainPage.RECEIVE_INPUT, case.receive, timeout)
+        response = await resp_info.value
+        result.rate_status = response.status
+        result.rate_ms = await _rate_ms(response)
+        # Сразу после ответа в поле ещё код монеты или прошлая котировка — ждём новое число
+        try:
+            await page.wait_for_function(QUOTE_JS, arg=[MainPage.RECEIVE_INPUT, before], timeout=timeout)
+        except PlaywrightTimeoutError:
+            result.error = "Котировка не появилась в поле You Get"
+            return result
+        result.quote = (await page.input_value(MainPage.RECEIVE_INPUT)).strip()
+        result.ok = response.ok
+    except PlaywrightTimeoutError as e:
+        result.error = f"Не дождались ответа курса: {e}".splitlines()[0]
+    except Exception as e:
+        result.error = str(e).splitlines()[0]
+    finally:
+        result.total_ms = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+async def _tab(tab_id: int, browser: Browser, cases: "asyncio.Queue[ExchangeCase]",
+               results: list, dead: list) -> None:
+    """Вкладка пула: берёт пары из общей очереди, пока они не кончатся."""
+    try:
+        page = await browser.new_page()
+        await page.goto(MainPage.URL, wait_until="domcontentloaded", timeout=30000)
+        await page.wait_for_selector(MainPage.EXCHANGE_FORM, timeout=30000)
+        while not cases.empty():
+            case = cases.get_nowait()
+            result = await quote_pair(page, case)
+            result.worker = tab_id
+            logger.info(
+                f"[{tab_id}] {case.send}→{case.receive} x{case.amount}: "
+                f"{result.quote or result.error} ({result.rate_ms} ms)"
+            )
+            results.append(result)
+            if not result.ok:
+                # После ошибки форма может остаться в неизвестном состоянии
+                await page.reload(wait_until="domcontentloaded")
+                await page.wait_for_selector(MainPage.EXCHANGE_FORM, timeout=30000)
+    except Exception as e:
+        logger.error(f"[{tab_id}] Вкладка пула завершилась с ошибкой: {e}")
+        dead.append(tab_id)
+
+
+async def _run_pool(cases: list[ExchangeCase], tabs: int, headless: bool) -> list[ExchangeResult]:
+    pending: "asyncio.Queue[ExchangeCase]" = asyncio.Queue()
+    for case in cases:
+        pending.put_nowait(case)
+    results: list[ExchangeResult] = []
+    dead: list[int] = []
+    count = max(1, min(tabs, len(cases)))
+    try:
+        async with async_playwright() as pw:
+            browser = await pw.chromium.launch(headless=headless)
+            try:
+                await asyncio.gather(*(_tab(i, browser, pending, results, dead) for i in range(count)))
+            finally:
+                await browser.close()
+    except Exception as e:
+        logger.error(f"Не удалось запустить браузер: {e}")
+
+    # Пары, до которых не дошли упавшие вкладки, попадают в отчёт как ошибки
+    if dead:
+        logger.error(f"Вкладок пула завершилось с ошибкой: {len(dead)} из {count}")
+    while not pending.empty():
+        case = pending.get_nowait()
+        results.append(ExchangeResult(case.send, case.receive, case.amount,
+                                      error="Не выполнено: вкладки пула завершились с ошибкой"))
+    return results
+
+
+def run_matrix(cases: list[ExchangeCase], workers: int = 4, headless: bool = True) -> list[ExchangeResult]:
+    """Прогоняет все пары пулом из `workers` вкладок и возвращает результаты в исходном порядке."""
+    results = asyncio.run(_run_pool(cases, workers, headless))
+    order = {(c.send, c.receive, c.amount): i for i, c in enumerate(cases)}
+    results.sort(key=lambda r: order.get((r.send, r.receive, r.amount), len(order)))
+    return results
+
+
+def write_report(results: list[ExchangeResult], out_dir: str = REPORTS_DIR) -> tuple[str, str]:
+    """Сохраняет таблицу прогона в CSV и JSON и возвращает пути к файлам."""
+    os.makedirs(out_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    base = os.path.join(out_dir, f"exchange_matrix_{timestamp}")
+    rows = [asdict(r) for r in results]
+    columns = list(ExchangeResult.__dataclass_fields__)
+
+    with open(f"{base}.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(f"{base}.json", "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+    return f"{base}.csv", f"{base}.json"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Параллельный прогон формы обмена по списку пар")
+    parser.add_argument("pairs", nargs="*", help="Пары в формате SEND:RECEIVE:AMOUNT")
+    parser.add_argument("--pairs-file", help="CSV с колонками send,receive,amount")
+    parser.add_argument("--workers", type=int, default=4, help="Размер пула вкладок")
+    parser.add_argument("--headed", action="store_true", help="Запуск с видимым браузером")
+    parser.add_argument("--out-dir", default=REPORTS_DIR)
+    args = parser.parse_args(argv)
+
+    cases = [parse_case(p) for p in args.pairs]
+    if args.pairs_file:
+        cases.extend(load_cases(args.pairs_file))
+    if not cases:
+        parser.error("Не задано ни одной пары")
+
+    started = time.perf_counter()
+    results = run_matrix(cases, workers=args.workers, headless=not args.headed)
+    csv_path, json_path = write_report(results, args.out_dir)
+
+    failed = [r for r in results if not r.ok]
+    logger.info(
+        f"Матрица обмена: {len(results) - len(failed)}/{len(results)} пар успешно "
+        f"за {time.perf_counter() - started:.1f}s. Отчёт: {csv_path}, {json_path}"
+    )
+    return 1 if failed or len(results) < len(cases) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
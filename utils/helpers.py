@@ -4,12 +4,16 @@ import random
 from datetime import datetime
 from playwright.sync_api import Page
 
-def take_screenshot(page: Page, name: str) -> str:
-    """Сделать скриншот при ошибке и вернуть путь."""
+def screenshot_path(name: str) -> str:
+    """Путь для нового скриншота с временной меткой."""
     os.makedirs("screenshots", exist_ok=True)
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"{name}_{timestamp}.png"
-    path = os.path.join("screenshots", filename)
+    return os.path.join("screenshots", f"{name}_{timestamp}.png")
+
+
+def take_screenshot(page: Page, name: str) -> str:
+    """Сделать скриншот при ошибке и вернуть путь."""
+    path = screenshot_path(name)
     page.screenshot(path=path, full_page=True)
     return path
 
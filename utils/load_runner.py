@@ -0,0 +1,279 @@
+# utils/load_runner.py
+"""
+Нагрузочный прогон пользовательских сценариев через page objects.
+
+N виртуальных пользователей (VU) с плавным набором (ramp-up) в течение
+заданного времени повторяют сценарий: каждая итерация — новый контекст
+браузера, шаги — вызовы тех же page objects, что и в UI-тестах.
+На выходе: перцентили задержки по шагам, пропускная способность и доля ошибок.
+
+VU распределяются по --browsers потокам-драйверам (по умолчанию — по числу
+ядер, но не больше числа VU): у каждого потока один драйвер Playwright и один
+браузер, а каждая итерация его VU — отдельный new_context(). Sync API
+Playwright привязан к потоку и выполняет один вызов за раз, поэтому VU одного
+потока выполняют итерации по очереди: одновременно идёт не больше --browsers
+итераций. Для большей параллельности увеличьте --browsers — ценой
+отдельного процесса браузера на каждый поток.
+
+Запуск:
+    python -m utils.load_runner --journey login_2fa --users 10 --ramp-up 30 --duration 300
+    python -m utils.load_runner --base-url http://localhost:8080 --users 5 --duration 60 --browsers 5
+
+Адрес стенда можно задать и через переменную окружения BASE_URL.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Callable, Optional
+from playwright.sync_api import sync_playwright, Page
+from utils.logger import logger
+from utils.metrics import summarize
+
+REPORTS_DIR = "reports"
+
+# Шаг сценария: (имя, функция(page, email, password, secret))
+Step = tuple[str, Callable[[Page, str, str, str], None]]
+
+
+@dataclass
+class StepSample:
+    step: str
+    vu: int
+    iteration: int
+    started: float
+    ms: float
+    ok: bool
+    error: str = ""
+
+
+def _journeys() -> dict[str, list[Step]]:
+    # Импорт page objects откладывается до момента, когда BASE_URL уже выставлен
+    from pages.auth_page import AuthPage
+    from pages.navbar import Navbar
+    from pages.profile_page import ProfilePage
+
+    return {
+        "login": [
+            ("login", lambda page, email, pwd, secret: AuthPage(page).login_without_2fa(email, pwd)),
+            ("profile", lambda page, email, pwd, secret: ProfilePage(page).navigate_to()),
+            ("logout", lambda page, email, pwd, secret: Navbar(page).logout()),
+        ],
+        "login_2fa": [
+            ("login_with_2fa", lambda page, email, pwd, secret: AuthPage(page).login_with_2fa(email, pwd, secret)),
+            ("profile", lambda page, email, pwd, secret: ProfilePage(page).navigate_to()),
+            ("logout", lambda page, email, pwd, secret: Navbar(page).logout()),
+        ],
+    }
+
+
+class LoadRunner:
+    """Запускает сценарий в `users` параллельных сессиях и собирает замеры шагов."""
+
+    def __init__(self, steps: list[Step], users: int, ramp_up: float, duration: float,
+                 email: str, password: str, secret: str = "", headless: bool = True,
+                 browsers: Optional[int] = None):
+        self.steps = steps
+        self.users = users
+        self.browsers = max(1, min(users, browsers or os.cpu_count() or 1))
+        self.ramp_up = ramp_up
+        self.duration = duration
+        self.email = email
+        self.password = password
+        self.secret = secret
+        self.headless = headless
+        self.samples: list[StepSample] = []
+        self.iterations = {"completed": 0, "failed": 0}
+        self.failed_users: dict[int, str] = {}    # VU, остановленные ошибкой вне шагов сценария
+        self._lock = threading.Lock()
+        self._deadline = 0.0
+
+    def _record(self, sample: StepSample) -> None:
+        with self._lock:
+            self.samples.append(sample)
+
+    def _iteration(self, browser, vu: int, iteration: int) -> bool:
+        context = browser.new_context()
+        try:
+            page = context.new_page()
+            for name, action in self.steps:
+                started = time.perf_counter()
+                try:
+                    action(page, self.email, self.password, self.secret)
+                except Exception as e:
+                    self._record(StepSample(name, vu, iteration, started,
+                                            (time.perf_counter() - started) * 1000, False, _error(e)))
+                    return False
+                self._record(StepSample(name, vu, iteration, started,
+                                        (time.perf_counter() - started) * 1000, True))
+            return True
+        finally:
+            context.close()
+
+    def _driver(self, vus: list[int], starts: dict[int, float]) -> None:
+        try:
+            # Sync API Playwright привязан к потоку: драйвер и браузер — на поток, не на VU
+            with sync_playwright() as pw:
+                browser = pw.chromium.launch(headless=self.headless)
+                try:
+                    self._rotate(browser, vus, starts)
+                finally:
+                    browser.close()
+        except Exception as e:
+            error = _error(e)
+            logger.error(f"Драйвер VU {', '.join(str(vu + 1) for vu in vus)} завершился с ошибкой: {error}")
+            with self._lock:
+                for vu in vus:
+                    self.failed_users.setdefault(vu, error)
+
+    def _rotate(self, browser, vus: list[int], starts: dict[int, float]) -> None:
+        """VU потока по очереди выполняют по итерации, каждый — с момента своего старта."""
+        iterations = dict.fromkeys(vus, 0)
+        active = list(vus)
+        while active and time.perf_counter() < self._deadline:
+            ready = [vu for vu in active if starts[vu] <= time.perf_counter()]
+            if not ready:
+                time.sleep(max(0.0, min(starts[vu] for vu in active) - time.perf_counter()))
+                continue
+            for vu in ready:
+                if time.perf_counter() >= self._deadline:
+                    break
+                if not iterations[vu]:
+                    logger.info(f"VU {vu + 1}/{self.users} запущен")
+                try:
+                    ok = self._iteration(browser, vu, iterations[vu])
+                except Exception as e:
+                    error = _error(e)
+                    logger.error(f"VU {vu + 1} завершился с ошибкой: {error}")
+                    with self._lock:
+                        self.failed_users[vu] = error
+                    active.remove(vu)
+                    continue
+                with self._lock:
+                    self.iterations["completed" if ok else "failed"] += 1
+                iterations[vu] += 1
+
+    def run(self) -> dict:
+        started = time.perf_counter()
+        self._deadline = started + self.duration
+        # Старты VU равномерно распределены по ramp-up, VU раздаются потокам по кругу
+        starts = {vu: started + self.ramp_up * vu / self.users for vu in range(self.users)}
+        threads = [
+            threading.Thread(target=self._driver, args=(list(range(i, self.users, self.browsers)), starts),
+                             daemon=True)
+            for i in range(self.browsers)
+        ]
+        for t in threads:
+            t.start()
+        logger.info(f"VU: {self.users}, браузеров: {self.browsers}, набор за {self.ramp_up} с")
+        for t in threads:
+            t.join()
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed: float) -> dict:
+        steps = {}
+        for name, _ in self.steps:
+            samples = [s for s in self.samples if s.step == name]
+            errors: dict[str, int] = {}
+            for s in samples:
+                if not s.ok:
+                    errors[s.error] = errors.get(s.error, 0) + 1
+            steps[name] = {
+                "latency_ms": summarize(s.ms for s in samples if s.ok),
+                "requests": len(samples),
+                "error_rate": round(sum(errors.values()) / len(samples), 4) if samples else 0.0,
+                "errors": errors,
+            }
+        total = self.iterations["completed"] + self.iterations["failed"]
+        return {
+            "users": self.users,
+            "browsers": self.browsers,
+            "ramp_up_s": self.ramp_up,
+            "duration_s": self.duration,
+            "elapsed_s": round(elapsed, 1),
+            "iterations": total,
+            "iterations_failed": self.iterations["failed"],
+            "users_failed": len(self.failed_users),
+            "user_errors": {str(vu + 1): error for vu, error in sorted(self.failed_users.items())},
+            "error_rate": round(self.iterations["failed"] / total, 4) if total else 0.0,
+            "throughput_per_s": round(self.iterations["completed"] / elapsed, 3) if elapsed else 0.0,
+            "steps": steps,
+        }
+
+
+def _error(e: Exception) -> str:
+    return str(e).splitlines()[0] if str(e) else type(e).__name__
+
+
+def write_report(report: dict, samples: list[StepSample], out_dir: str = REPORTS_DIR) -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    path = os.path.join(out_dir, f"load_{timestamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({**report, "samples": [asdict(s) for s in samples]}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def _read_secret() -> str:
+    secret = os.getenv("TWOFA_SECRET", "")
+    path = os.path.join(os.getcwd(), "last_twofa_secret.txt")
+    if not secret and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            secret = f.read().strip()
+    return secret
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон сценариев через page objects")
+    parser.add_argument("--journey", default="login", help="Сценарий: login или login_2fa")
+    parser.add_argument("--users", type=int, default=5, help="Число параллельных сессий")
+    parser.add_argument("--browsers", type=int, help="Число потоков-драйверов с браузером (по умолчанию — по числу ядер)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Время набора всех VU, сек")
+    parser.add_argument("--duration", type=float, default=60.0, help="Ограничение по времени, сек")
+    parser.add_argument("--base-url", help="Адрес стенда (по умолчанию BASE_URL из окружения)")
+    parser.add_argument("--headed", action="store_true", help="Запуск с видимым браузером")
+    parser.add_argument("--out-dir", default=REPORTS_DIR)
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        os.environ["BASE_URL"] = args.base_url
+    # Учётные данные и BASE_URL подтягиваются из .env при импорте config
+    from utils import config  # noqa: F401
+
+    journeys = _journeys()
+    if args.journey not in journeys:
+        parser.error(f"Неизвестный сценарий {args.journey!r}, доступны: {', '.join(journeys)}")
+
+    email, password = os.getenv("EMAIL", ""), os.getenv("PASSWORD", "")
+    if not email or not password:
+        parser.error("EMAIL/PASSWORD не заданы в .env")
+    secret = _read_secret()
+    if args.journey == "login_2fa" and not secret:
+        parser.error("Для сценария login_2fa нужен TWOFA_SECRET или last_twofa_secret.txt")
+
+    runner = LoadRunner(journeys[args.journey], args.users, args.ramp_up, args.duration,
+                        email, password, secret, headless=not args.headed, browsers=args.browsers)
+    report = runner.run()
+    path = write_report(report, runner.samples, args.out_dir)
+
+    for name, stats in report["steps"].items():
+        lat = stats["latency_ms"]
+        logger.info(
+            f"{name:<16} n={stats['requests']:<5} p50={lat.get('p50', '-')} p95={lat.get('p95', '-')} "
+            f"p99={lat.get('p99', '-')} max={lat.get('max', '-')} ms, ошибки={stats['error_rate']:.1%}"
+        )
+    logger.info(
+        f"Итерации: {report['iterations']} (ошибки {report['error_rate']:.1%}), "
+        f"пропускная способность {report['throughput_per_s']} итер/с. Отчёт: {path}"
+    )
+    if report["users_failed"]:
+        logger.error(f"VU, остановленные ошибкой: {report['users_failed']} из {report['users']} {report['user_errors']}")
+    completed = report["iterations"] - report["iterations_failed"]
+    return 1 if report["iterations_failed"] or report["users_failed"] or not completed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+# utils/login_cases.py
+"""
+Двухуровневая проверка негативных кейсов входа.
+
+Каждый кейс сначала проверяется на уровне HTTP: все кейсы таблицы одним
+пакетом отправляются в POST /api/login из пула потоков (у каждого потока
+своя requests.Session с keep-alive), ожидается отказ — статус 4xx.
+
+В браузере через AuthPage повторяются только:
+  - выборка из LOGIN_UI_SAMPLE кейсов (по умолчанию 2, "all" — все кейсы);
+  - каждый кейс, ответ API которого разошёлся с ожиданием.
+
+Выборка детерминирована для значения LOGIN_UI_SEED (по умолчанию — текущая
+дата): воркеры xdist выбирают одни и те же кейсы, а от прогона к прогону
+выборка меняется, и со временем в UI проходит вся таблица.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Optional
+import requests
+from utils import api_client
+from utils.logger import logger
+
+LOGIN_API_CONCURRENCY = int(os.getenv("LOGIN_API_CONCURRENCY", "8"))
+LOGIN_UI_SAMPLE = os.getenv("LOGIN_UI_SAMPLE", "2")       # число кейсов или "all"
+LOGIN_UI_SEED = os.getenv("LOGIN_UI_SEED", "") or date.today().isoformat()
+
+
+@dataclass(frozen=True)
+class LoginCase:
+    id: str
+    email: str
+    password: str
+    alert_selector: str       # контейнер алерта в форме входа
+    expected_text: str        # текст, который должен увидеть пользователь
+    api_status: tuple[int, int] = (400, 499)   # допустимый диапазон статуса /api/login
+
+    @property
+    def submits(self) -> bool:
+        """Отправляет ли форма запрос: с пустыми полями срабатывает валидация на клиенте."""
+        return bool(self.email or self.password)
+
+
+@dataclass
+class ApiResult:
+    status: Optional[int] = None
+    body: str = ""
+    error: Optional[str] = None
+    expected: bool = False
+
+    def __str__(self) -> str:
+        if self.error:
+            return f"ошибка запроса: {self.error}"
+        return f"HTTP {self.status}: {self.body[:200]}"
+
+
+def check_case(case: LoginCase, session: Optional[requests.Session] = None,
+               base_url: Optional[str] = None) -> ApiResult:
+    try:
+        response = api_client.login(case.email, case.password, session=session, base_url=base_url)
+    except requests.RequestException as e:
+        return ApiResult(error=type(e).__name__)
+    low, high = case.api_status
+    return ApiResult(response.status_code, response.text, expected=low <= response.status_code <= high)
+
+
+def check_cases(cases: Iterable[LoginCase], concurrency: int = LOGIN_API_CONCURRENCY,
+                base_url: Optional[str] = None) -> dict[str, ApiResult]:
+    """Проверяет все кейсы через /api/login параллельно; результат по id кейса."""
+    cases = list(cases)
+    local = threading.local()
+
+    def run(case: LoginCase) -> ApiResult:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = api_client.create_session(pool_size=1)
+        return check_case(case, session, base_url)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(cases))),
+                            thread_name_prefix="login-api") as pool:
+        results = dict(zip((c.id for c in cases), pool.map(run, cases)))
+    diverged = [case_id for case_id, r in results.items() if not r.expected]
+    logger.info(f"Негативные кейсы входа через API: {len(results)}, расхождений: {len(diverged)}")
+    for case_id in diverged:
+        logger.warning(f"Кейс {case_id}: ответ API не совпал с ожиданием — {results[case_id]}")
+    return results
+
+
+def ui_sample(case_ids: Iterable[str], size: str = LOGIN_UI_SAMPLE, seed: str = LOGIN_UI_SEED) -> set[str]:
+    """Детерминированная выборка кейсов для проверки в браузере."""
+    case_ids = list(case_ids)
+    if size.strip().lower() == "all":
+        return set(case_ids)
+    ranked = sorted(case_ids, key=lambda c: hashlib.sha1(f"{seed}:{c}".encode()).hexdigest())
+    return set(ranked[:int(size)])
+
+
+def ui_reason(case: LoginCase, result: ApiResult, sample: set[str]) -> Optional[str]:
+    """Почему кейс нужно повторить в браузере; None — достаточно проверки API."""
+    if not result.expected:
+        return f"расхождение API ({result})"
+    if case.id in sample:
+        return "выборка UI"
+    return None
@@ -0,0 +1,192 @@
+# utils/memory_watchdog.py
+"""
+Сторож памяти браузера с автоматическим перезапуском.
+
+Браузер живёт весь прогон, а контексты и страницы создаются и закрываются
+на каждом тесте — к концу длинного прогона Chromium разрастается и тесты
+замедляются. BrowserManager после каждого теста снимает RSS процессов
+браузера (по /proc) и JS-heap страницы (performance.memory, а если он
+недоступен — CDP Runtime.getHeapUsage), пишет замер в reports/memory.jsonl и
+между тестами перезапускает браузер, если превышен порог:
+
+  BROWSER_RSS_LIMIT_MB — суммарный RSS процессов браузера (по умолчанию 1500);
+  JS_HEAP_LIMIT_MB     — JS-heap страницы перед закрытием (по умолчанию 512);
+  BROWSER_MAX_TESTS    — перезапуск каждые N тестов (0 — не ограничено).
+
+Отключившийся (упавший) браузер перезапускается всегда. На системах без /proc
+RSS не снимается, остальные проверки работают.
+"""
+import json
+import os
+from datetime import datetime
+from typing import Callable, Optional
+from playwright.sync_api import Browser, Page
+from utils.logger import logger
+
+MEMORY_LOG = os.path.join("reports", "memory.jsonl")
+BROWSER_RSS_LIMIT_MB = float(os.getenv("BROWSER_RSS_LIMIT_MB", "1500"))
+JS_HEAP_LIMIT_MB = float(os.getenv("JS_HEAP_LIMIT_MB", "512"))
+BROWSER_MAX_TESTS = int(os.getenv("BROWSER_MAX_TESTS", "0"))
+
+
+def _parent_map() -> dict[int, int]:
+    """pid -> ppid для всех процессов из /proc."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Имя процесса в скобках может содержать пробелы — поля считаются после ')'
+        parents[int(entry)] = int(stat.rsplit(")", 1)[1].split()[1])
+    return parents
+
+
+def descendants(pid: int, parents: Optional[dict[int, int]] = None) -> set[int]:
+    parents = _parent_map() if parents is None else parents
+    children: dict[int, list[int]] = {}
+    for child, parent in parents.items():
+        children.setdefault(parent, []).append(child)
+    found, stack = set(), [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            if child not in found:
+                found.add(child)
+                stack.append(child)
+    return found
+
+
+def rss_mb(pids: set[int]) -> float:
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue  # процесс успел завершиться
+    return round(total_kb / 1024, 1)
+
+
+def js_heap_mb(page: Page) -> Optional[float]:
+    """Используемый JS-heap страницы, МБ; None, если движок его не сообщает."""
+    try:
+        used = page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : null")
+        if used is None and page.context.browser and page.context.browser.browser_type.name == "chromium":
+            session = page.context.new_cdp_session(page)
+            try:
+                used = session.send("Runtime.getHeapUsage")["usedSize"]
+            finally:
+                session.detach()
+    except Exception as e:
+        logger.debug(f"JS-heap не снят: {e}")
+        return None
+    return None if used is None else round(used / 1024 / 1024, 1)
+
+
+class BrowserManager:
+    """Держит браузер движка и перезапускает его между тестами по порогам памяти."""
+
+    def __init__(self, launcher: Callable[[], Browser], engine: str,
+                 rss_limit_mb: float = BROWSER_RSS_LIMIT_MB, heap_limit_mb: float = JS_HEAP_LIMIT_MB,
+                 max_tests: int = BROWSER_MAX_TESTS, log_path: str = MEMORY_LOG):
+        self.launcher = launcher
+        self.engine = engine
+        self.rss_limit_mb = rss_limit_mb
+        self.heap_limit_mb = heap_limit_mb
+        self.max_tests = max_tests
+        self.log_path = log_path
+        self.proc = os.path.isdir("/proc")
+        self.roots: set[int] = set()
+        self.tests_since_launch = 0
+        self.recycles = 0
+        self.peak_rss_mb = 0.0
+        self.last_heap_mb: Optional[float] = None
+        self.browser = self._launch()
+
+    def _launch(self) -> Browser:
+        before = descendants(os.getpid()) if self.proc else set()
+        browser = self.launcher()
+        if self.proc:
+            parents = _parent_map()
+            new = descendants(os.getpid(), parents) - before
+            # Корни дерева браузера: новые процессы, родитель которых не новый
+            self.roots = {pid for pid in new if parents.get(pid) not in new}
+        self.tests_since_launch = 0
+        return browser
+
+    def browser_rss_mb(self) -> Optional[float]:
+        if not self.proc or not self.roots:
+            return None
+        parents = _parent_map()
+        pids = {pid for pid in self.roots if pid in parents}
+        for root in list(pids):
+            pids |= descendants(root, parents)
+        return rss_mb(pids)
+
+    def sample_page(self, page: Page) -> None:
+        """Снимает JS-heap страницы перед её закрытием."""
+        self.last_heap_mb = js_heap_mb(page)
+
+    def _reasons(self, rss: Optional[float], heap: Optional[float]) -> list[str]:
+        reasons = []
+        if not self.browser.is_connected():
+            reasons.append("браузер отключился")
+        if rss is not None and rss > self.rss_limit_mb:
+            reasons.append(f"RSS {rss} МБ > {self.rss_limit_mb} МБ")
+        if heap is not None and heap > self.heap_limit_mb:
+            reasons.append(f"JS-heap {heap} МБ > {self.heap_limit_mb} МБ")
+        if self.max_tests and self.tests_since_launch >= self.max_tests:
+            reasons.append(f"выполнено {self.tests_since_launch} тестов")
+        return reasons
+
+    def after_test(self, test: str, duration_s: float) -> None:
+        """Замер после теста, запись в лог и перезапуск браузера при превышении порогов."""
+        self.tests_since_launch += 1
+        rss = self.browser_rss_mb()
+        heap, self.last_heap_mb = self.last_heap_mb, None
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        reasons = self._reasons(rss, heap)
+        self._write({
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "test": test,
+            "engine": self.engine,
+            "duration_s": round(duration_s, 2),
+            "rss_mb": rss,
+            "js_heap_mb": heap,
+            "tests_since_launch": self.tests_since_launch,
+            "recycled": bool(reasons),
+            "reasons": reasons,
+        })
+        if reasons:
+            self.recycle(", ".join(reasons))
+
+    def recycle(self, reason: str) -> None:
+        logger.warning(f"Перезапуск браузера {self.engine}: {reason}")
+        try:
+            self.browser.close()
+        except Exception as e:
+            logger.warning(f"Не удалось закрыть браузер {self.engine}: {e}")
+        self.browser = self._launch()
+        self.recycles += 1
+
+    def _write(self, sample: dict) -> None:
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        try:
+            self.browser.close()
+        finally:
+            logger.info(self.summary())
+
+    def summary(self) -> str:
+        peak = f"{self.peak_rss_mb} МБ" if self.proc else "нет данных"
+        return f"Память браузера {self.engine}: пик RSS {peak}, перезапусков {self.recycles}"
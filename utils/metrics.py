@@ -0,0 +1,131 @@
+# utils/metrics.py
+import functools
+import math
+import time
+import weakref
+from typing import Iterable
+
+
+def percentile(values: Iterable[float], q: float) -> float:
+    """Перцентиль q (0–100) методом ближайшего ранга."""
+    data = sorted(values)
+    if not data:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(data)))
+    return data[min(rank, len(data)) - 1]
+
+
+def summarize(values: Iterable[float]) -> dict:
+    """Сводка по выборке длительностей в мс: count/min/mean/p50/p90/p95/p99/max."""
+    data = sorted(values)
+    if not data:
+        return {"count": 0}
+    return {
+        "count": len(data),
+        "min": round(data[0], 1),
+        "mean": round(sum(data) / len(data), 1),
+        "p50": round(percentile(data, 50), 1),
+        "p90": round(percentile(data, 90), 1),
+        "p95": round(percentile(data, 95), 1),
+        "p99": round(percentile(data, 99), 1),
+        "max": round(data[-1], 1),
+    }
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек в духе HdrHistogram: лог-линейные корзины с заданной
+    точностью (значащие цифры), фиксированная память и слияние гистограмм
+    из разных потоков. Значения принимаются в мс, хранятся в мкс.
+    """
+
+    def __init__(self, significant_digits: int = 3):
+        # Число линейных подкорзин на каждую степень двойки
+        self._sub_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us: int = 0
+        self.max_us: int = 0
+
+    def _bucket(self, value_us: int) -> int:
+        shift = max(0, value_us.bit_length() - self._sub_bits)
+        return (value_us >> shift) << shift
+
+    def _bucket_top(self, bucket: int) -> int:
+        shift = max(0, bucket.bit_length() - self._sub_bits)
+        return bucket + (1 << shift) - 1
+
+    def record(self, value_ms: float) -> None:
+        value_us = max(0, int(value_ms * 1000))
+        bucket = self._bucket(value_us)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.min_us = value_us if not self.count else min(self.min_us, value_us)
+        self.max_us = max(self.max_us, value_us)
+        self.count += 1
+        self.total_us += value_us
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for bucket, n in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + n
+        if other.count:
+            self.min_us = other.min_us if not self.count else min(self.min_us, other.min_us)
+            self.max_us = max(self.max_us, other.max_us)
+        self.count += other.count
+        self.total_us += other.total_us
+
+    def value_at(self, q: float) -> float:
+        """Значение перцентиля q (0–100) в мс с точностью корзины."""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(self._bucket_top(bucket), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min": round(self.min_us / 1000, 1),
+            "mean": round(self.total_us / self.count / 1000, 1),
+            "p50": round(self.value_at(50), 1),
+            "p95": round(self.value_at(95), 1),
+            "p99": round(self.value_at(99), 1),
+            "max": round(self.max_us / 1000, 1),
+        }
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Непустые корзины: (верхняя граница в мс, число попаданий)."""
+        return [(self._bucket_top(b) / 1000, self.counts[b]) for b in sorted(self.counts)]
+
+
+# Замеры шагов по страницам: page -> [{"step", "ms"}]
+_PAGE_STEPS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def record_step(page, step: str, ms: float) -> None:
+    """Сохраняет длительность шага для страницы (попадает в отчёт теста)."""
+    _PAGE_STEPS.setdefault(page, []).append({"step": step, "ms": round(ms, 1)})
+
+
+def page_steps(page) -> list[dict]:
+    return list(_PAGE_STEPS.get(page, []))
+
+
+def timed(step: str):
+    """Декоратор метода page object: длительность всего метода записывается как шаг `step`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                record_step(self.page, step, (time.perf_counter() - started) * 1000)
+        return wrapper
+    return decorator
@@ -0,0 +1,166 @@
+# utils/page_watcher.py
+"""
+Наблюдатель за ошибками страницы во время теста.
+
+Подписывается на события response, requestfailed, console и pageerror и
+проверяет их по правилам (например, любой 5xx на /api/). Первое совпадение
+запоминается, и ближайшая проверка в ожиданиях BaseTest прерывает тест
+ошибкой BackendError с описанием запроса-виновника — вместо того чтобы ждать
+полный таймаут wait_for_url или wait_for_element.
+
+Включён по умолчанию (FAIL_FAST=0 — выключить). Правила по умолчанию не
+срабатывают на обычный трафик: отменённые запросы (навигация прерывает
+незавершённые XHR — net::ERR_ABORTED и аналоги) не считаются ошибкой, а
+исключения JS учитываются только из скриптов своего домена (FIRST_PARTY_HOSTS
+из utils.config). Свои правила
+задаются JSON в FAIL_FAST_RULES, например:
+    [{"name": "4xx на /api/login", "event": "response", "url_contains": "/api/login", "min_status": 400}]
+"""
+import json
+import os
+import re
+import weakref
+from dataclasses import dataclass, field
+from typing import Optional
+from playwright.sync_api import Page
+from utils.logger import logger
+from utils.page_weight import is_first_party
+
+FAIL_FAST = os.getenv("FAIL_FAST", "1") == "1"
+
+# Отмена запроса при навигации или abort(): Chromium, Firefox, WebKit
+ABORTED_PATTERN = r"ERR_ABORTED|NS_BINDING_ABORTED|NS_ERROR_ABORT|cancelled"
+STACK_URL = re.compile(r"https?://[^\s)]+?(?=:\d+:\d+|\)|\s|$)")
+
+
+@dataclass
+class Rule:
+    name: str
+    event: str                      # response | requestfailed | console | pageerror
+    url_contains: str = ""
+    min_status: int = 0
+    max_status: int = 599
+    text_pattern: str = ""          # регулярное выражение для console/pageerror
+    exclude_pattern: str = ""       # совпадение текста исключает событие
+    first_party: bool = False       # только события из скриптов своего домена
+    console_types: tuple = ("error",)
+
+    def matches(self, event: str, url: str = "", status: int = 0, text: str = "", console_type: str = "",
+                source: str = "") -> bool:
+        if event != self.event:
+            return False
+        if self.url_contains and self.url_contains not in url:
+            return False
+        if self.first_party and not (source and is_first_party(source)):
+            return False
+        if event == "response" and not (self.min_status <= status <= self.max_status):
+            return False
+        if event == "console" and console_type not in self.console_types:
+            return False
+        if self.text_pattern and not re.search(self.text_pattern, text):
+            return False
+        if self.exclude_pattern and re.search(self.exclude_pattern, text):
+            return False
+        return True
+
+
+DEFAULT_RULES = [
+    Rule("5xx на /api/", "response", url_contains="/api/", min_status=500),
+    Rule("запрос к /api/ не выполнен", "requestfailed", url_contains="/api/", exclude_pattern=ABORTED_PATTERN),
+    Rule("необработанное исключение JS", "pageerror", first_party=True),
+]
+
+
+def load_rules() -> list[Rule]:
+    raw = os.getenv("FAIL_FAST_RULES")
+    if not raw:
+        return list(DEFAULT_RULES)
+    return [Rule(**{**r, "console_types": tuple(r.get("console_types", ("error",)))}) for r in json.loads(raw)]
+
+
+class BackendError(AssertionError):
+    """Во время ожидания сработало правило наблюдателя."""
+
+
+@dataclass
+class Violation:
+    rule: str
+    event: str
+    description: str
+    response: Optional[object] = field(default=None, repr=False)
+
+    def details(self) -> str:
+        text = f"[{self.rule}] {self.description}"
+        if self.response is not None:
+            try:
+                body = self.response.text()[:500]
+                text += f"\nТело ответа: {body}"
+            except Exception:
+                pass
+        return text
+
+
+class PageWatcher:
+    """Проверяет события страницы по правилам и хранит первое нарушение."""
+
+    def __init__(self, page: Page, rules: list[Rule]):
+        self.page = page
+        self.rules = rules
+        self.violation: Optional[Violation] = None
+        self.events: list[str] = []
+        page.on("response", self._on_response)
+        page.on("requestfailed", self._on_request_failed)
+        page.on("console", self._on_console)
+        page.on("pageerror", self._on_page_error)
+
+    def _match(self, event: str, description: str, response=None, **attrs) -> None:
+        for rule in self.rules:
+            if rule.matches(event, **attrs):
+                self.events.append(f"[{rule.name}] {description}")
+                if self.violation is None:
+                    self.violation = Violation(rule.name, event, description, response)
+                    logger.error(f"Сработало правило '{rule.name}': {description}")
+                return
+
+    def _on_response(self, response) -> None:
+        request = response.request
+        self._match(
+            "response", f"{request.method} {response.url} -> HTTP {response.status}",
+            response=response, url=response.url, status=response.status
+        )
+
+    def _on_request_failed(self, request) -> None:
+        self._match(
+            "requestfailed", f"{request.method} {request.url} -> {request.failure}",
+            url=request.url, text=request.failure or ""
+        )
+
+    def _on_console(self, message) -> None:
+        self._match(
+            "console", f"console.{message.type}: {message.text}",
+            text=message.text, console_type=message.type, url=self.page.url
+        )
+
+    def _on_page_error(self, error) -> None:
+        text = str(error)
+        # Источник — первый URL в стеке (верхний кадр); без стека источник неизвестен
+        match = STACK_URL.search(getattr(error, "stack", None) or "")
+        self._match("pageerror", f"pageerror: {text}", text=text, url=self.page.url,
+                    source=match.group(0) if match else "")
+
+    def raise_if_violated(self, step: str) -> None:
+        if self.violation is not None:
+            raise BackendError(f"Шаг '{step}' прерван: {self.violation.details()}")
+
+
+_WATCHERS: "weakref.WeakKeyDictionary[Page, PageWatcher]" = weakref.WeakKeyDictionary()
+
+
+def watch_page(page: Page, rules: Optional[list[Rule]] = None) -> PageWatcher:
+    watcher = PageWatcher(page, load_rules() if rules is None else rules)
+    _WATCHERS[page] = watcher
+    return watcher
+
+
+def watcher_for(page: Page) -> Optional[PageWatcher]:
+    return _WATCHERS.get(page)
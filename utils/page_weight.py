@@ -0,0 +1,317 @@
+# utils/page_weight.py
+"""
+Вес страниц: количество запросов, переданные и распакованные байты.
+
+PageMeter подключается к странице в фикстуре page и делит запросы на
+просмотры страниц: новый просмотр начинается с запроса документа основного
+фрейма (редирект продолжает тот же просмотр) или со смены URL внутри SPA.
+Запрос относится к просмотру, во время которого он начался, а не закончился.
+Для каждого просмотра считаются итоги по типу ресурса и по своему/стороннему
+домену (свои домены — FIRST_PARTY_HOSTS из utils.config). Переданные байты
+берутся из request.sizes(), распакованные — из Resource Timing
+(decodedBodySize); если браузер их не сообщает (сторонний домен без
+Timing-Allow-Origin или документ уже закрыт), используется размер тела на проводе.
+
+Просмотры страниц sign-in, profile и main сравниваются с историей в
+reports/page_weight.sqlite отдельно по движку и режиму ASSET_CACHE: рост количества запросов или переданных байт
+больше чем на PAGE_WEIGHT_TOLERANCE относительно медианы последних прогонов
+даёт предупреждение (PAGE_WEIGHT_MODE=warn) или падение теста (fail).
+Абсолютные бюджеты можно задать JSON в PAGE_WEIGHT_BUDGETS:
+    {"sign-in": {"requests": 80, "transfer_kb": 1500}}
+"""
+import json
+import os
+import re
+import sqlite3
+import statistics
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from urllib.parse import urlparse
+import pytest
+from playwright.sync_api import Page, Request
+from utils.asset_cache import ASSET_CACHE
+from utils.config import FIRST_PARTY_HOSTS
+from utils.logger import logger
+
+WEIGHT_DB = os.path.join("reports", "page_weight.sqlite")
+PAGE_WEIGHT_MODE = os.getenv("PAGE_WEIGHT_MODE", "warn")          # warn | fail | off
+PAGE_WEIGHT_TOLERANCE = float(os.getenv("PAGE_WEIGHT_TOLERANCE", "0.2"))
+PAGE_WEIGHT_BUDGETS = json.loads(os.getenv("PAGE_WEIGHT_BUDGETS", "{}"))
+HISTORY_RUNS = 10        # сколько последних замеров страницы берётся для медианы
+MIN_HISTORY = 3          # меньше замеров — сравнивать не с чем
+
+# Страницы, для которых действуют бюджеты; остальные просто учитываются
+URL_KEYS = [
+    ("sign-in", re.compile(r"/sign-in/?$")),
+    ("profile", re.compile(r"/dashboard/profile/?$")),
+    ("main", re.compile(r"^/?$")),
+]
+
+RESOURCE_TIMING_JS = """
+() => performance.getEntriesByType("resource").concat(performance.getEntriesByType("navigation"))
+    .map((e) => [e.name, e.decodedBodySize])
+"""
+
+
+def url_key(url: str) -> str:
+    path = urlparse(url).path
+    for key, pattern in URL_KEYS:
+        if pattern.search(path):
+            return key
+    return path or "/"
+
+
+def is_first_party(url: str, hosts: list[str] = FIRST_PARTY_HOSTS) -> bool:
+    """Свой ли домен у URL: хост из FIRST_PARTY_HOSTS или его поддомен."""
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == h or host.endswith("." + h) for h in hosts)
+
+
+@dataclass
+class Totals:
+    requests: int = 0
+    transfer: int = 0
+    decoded: int = 0
+
+    def add(self, transfer: int, decoded: int) -> None:
+        self.requests += 1
+        self.transfer += transfer
+        self.decoded += decoded
+
+
+@dataclass
+class PageView:
+    key: str
+    url: str
+    requests: list = field(default_factory=list)
+
+    def summarize(self, decoded_sizes: dict[str, int]) -> dict:
+        total, by_type, by_party = Totals(), defaultdict(Totals), defaultdict(Totals)
+        estimated = 0
+        for request in self.requests:
+            try:
+                sizes = request.sizes()
+            except Exception:
+                continue  # запрос без ответа (прерван или отдан из памяти)
+            body = max(sizes.get("responseBodySize", 0), 0)
+            transfer = body + max(sizes.get("responseHeadersSize", 0), 0)
+            decoded = decoded_sizes.get(request.url) or 0
+            if not decoded:
+                decoded, estimated = body, estimated + 1
+            for totals in (total, by_type[request.resource_type],
+                           by_party["first" if is_first_party(request.url) else "third"]):
+                totals.add(transfer, decoded)
+        return {
+            "key": self.key,
+            "url": self.url,
+            **vars(total),
+            "decoded_estimated": estimated,
+            "by_type": {k: vars(v) for k, v in sorted(by_type.items())},
+            "by_party": {k: vars(v) for k, v in sorted(by_party.items())},
+        }
+
+
+class PageMeter:
+    """Учёт запросов страницы по просмотрам."""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.views: list[PageView] = []
+        self.decoded_sizes: dict[str, int] = {}
+        self.summary: Optional[list[dict]] = None
+        self._pending: dict[Request, PageView] = {}   # начатые, но не завершённые запросы
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_finished)
+        page.on("requestfailed", lambda request: self._pending.pop(request, None))
+        page.on("framenavigated", self._on_navigated)
+
+    def _start(self, url: str) -> None:
+        self.views.append(PageView(url_key(url), url))
+
+    def _on_request(self, request: Request) -> None:
+        # Запрос документа приходит раньше framenavigated (тот срабатывает на commit),
+        # поэтому просмотр начинается здесь и навигация его уже не делит
+        if request.is_navigation_request() and request.frame == self.page.main_frame:
+            if request.redirected_from is not None and self.views:
+                self.views[-1].key, self.views[-1].url = url_key(request.url), request.url
+            else:
+                self._start(request.url)
+        elif not self.views:
+            self._start(self.page.url)
+        self._pending[request] = self.views[-1]
+
+    def _on_finished(self, request: Request) -> None:
+        view = self._pending.pop(request, None)
+        if view is not None:
+            view.requests.append(request)
+
+    def _on_navigated(self, frame) -> None:
+        # Переход внутри SPA: запроса документа нет, меняется только URL
+        if frame == self.page.main_frame and self.views and url_key(frame.url) != self.views[-1].key:
+            self._start(frame.url)
+
+    def capture_timing(self) -> None:
+        """Сохраняет распакованные размеры из Resource Timing, пока документ ещё открыт."""
+        try:
+            for name, size in self.page.evaluate(RESOURCE_TIMING_JS):
+                if size:
+                    self.decoded_sizes[name] = size
+        except Exception as e:
+            logger.debug(f"Resource Timing не прочитан: {e}")
+
+    def finish(self) -> list[dict]:
+        if self.summary is None:
+            self.capture_timing()
+            self.summary = [v.summarize(self.decoded_sizes) for v in self.views if v.requests]
+        return self.summary
+
+
+_METERS: "weakref.WeakKeyDictionary[Page, PageMeter]" = weakref.WeakKeyDictionary()
+
+
+def track_page(page: Page) -> PageMeter:
+    meter = PageMeter(page)
+    _METERS[page] = meter
+    return meter
+
+
+def meter_for(page: Page) -> Optional[PageMeter]:
+    return _METERS.get(page)
+
+
+class WeightHistory:
+    """История веса страниц в SQLite."""
+
+    def __init__(self, path: str = WEIGHT_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        with self._connect() as db:
+            db.execute(
+                """CREATE TABLE IF NOT EXISTS weights (
+                       key TEXT, engine TEXT, requests INTEGER, transfer INTEGER,
+                       decoded INTEGER, test TEXT, ts TEXT)"""
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def baseline(self, key: str, engine: str, runs: int = HISTORY_RUNS) -> Optional[dict]:
+        """Медиана последних замеров страницы; None, если их слишком мало."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT requests, transfer FROM weights WHERE key = ? AND engine = ? ORDER BY ts DESC LIMIT ?",
+                (key, engine, runs),
+            ).fetchall()
+        if len(rows) < MIN_HISTORY:
+            return None
+        return {
+            "requests": statistics.median(r[0] for r in rows),
+            "transfer": statistics.median(r[1] for r in rows),
+        }
+
+    def record(self, view: dict, engine: str, test: str) -> None:
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO weights VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (view["key"], engine, view["requests"], view["transfer"], view["decoded"], test,
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+
+
+def check_view(view: dict, baseline: Optional[dict], tolerance: float = PAGE_WEIGHT_TOLERANCE,
+               budgets: dict = PAGE_WEIGHT_BUDGETS) -> list[str]:
+    """Превышения бюджета и регрессии относительно истории для одного просмотра."""
+    problems = []
+    budget = budgets.get(view["key"], {})
+    if "requests" in budget and view["requests"] > budget["requests"]:
+        problems.append(f"{view['key']}: запросов {view['requests']} > бюджета {budget['requests']}")
+    if "transfer_kb" in budget and view["transfer"] / 1024 > budget["transfer_kb"]:
+        problems.append(f"{view['key']}: передано {view['transfer'] / 1024:.0f} КБ > бюджета {budget['transfer_kb']} КБ")
+    if baseline:
+        for metric in ("requests", "transfer"):
+            limit = baseline[metric] * (1 + tolerance)
+            if baseline[metric] and view[metric] > limit:
+                problems.append(
+                    f"{view['key']}: {metric} {view[metric]} > медианы {baseline[metric]:.0f} на "
+                    f"{(view[metric] / baseline[metric] - 1) * 100:.0f}%"
+                )
+    return problems
+
+
+def format_views(views: list[dict]) -> str:
+    lines = []
+    for v in views:
+        parties = ", ".join(f"{k}: {t['requests']} / {t['transfer'] / 1024:.0f} КБ" for k, t in v["by_party"].items())
+        lines.append(
+            f"{v['key']}: запросов {v['requests']}, передано {v['transfer'] / 1024:.0f} КБ, "
+            f"распаковано {v['decoded'] / 1024:.0f} КБ ({parties})"
+        )
+        for rtype, t in v["by_type"].items():
+            lines.append(f"    {rtype}: {t['requests']} / {t['transfer'] / 1024:.0f} КБ / {t['decoded'] / 1024:.0f} КБ")
+    return "\n".join(lines)
+
+
+class PageWeightPlugin:
+    """pytest-плагин: проверка веса страниц после теста, история и сводка."""
+
+    def __init__(self, history: WeightHistory, mode: str = PAGE_WEIGHT_MODE):
+        self.history = history
+        self.mode = mode
+        self.totals: dict[str, list[dict]] = defaultdict(list)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        outcome = yield
+        page = item.funcargs.get("page")
+        meter = meter_for(page) if page is not None else None
+        if meter is None or self.mode == "off":
+            return
+        views = meter.finish()
+        if outcome.excinfo is not None:
+            return  # упавший тест загрузил не все страницы — в историю не пишем
+        engine = page.context.browser.browser_type.name if page.context.browser else ""
+        if ASSET_CACHE:
+            engine += "+asset-cache"  # кэш статики меняет переданные байты — это другая история
+        problems = []
+        for view in views:
+            if any(view["key"] == key for key, _ in URL_KEYS):
+                problems += check_view(view, self.history.baseline(view["key"], engine))
+            self.history.record(view, engine, item.nodeid)
+        if not problems:
+            return
+        message = "Вес страниц вырос:\n" + "\n".join(problems)
+        if self.mode == "fail":
+            outcome.force_exception(AssertionError(message))
+        else:
+            logger.warning(message)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        rep = outcome.get_result()
+        page = item.funcargs.get("page")
+        meter = meter_for(page) if page is not None else None
+        if rep.when == "call" and meter and meter.summary:
+            rep.sections.append(("Вес страниц", format_views(meter.summary)))
+            # user_properties передаются с воркеров xdist вместе с отчётом
+            rep.user_properties.append(("page_weight", meter.summary))
+
+    def pytest_runtest_logreport(self, report) -> None:
+        for view in dict(report.user_properties).get("page_weight", []) if report.when == "call" else []:
+            self.totals[view["key"]].append(view)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        keyed = {k: v for k, v in self.totals.items() if any(k == key for key, _ in URL_KEYS)}
+        if not keyed:
+            return
+        terminalreporter.section("Вес страниц (медиана за прогон)")
+        for key, views in keyed.items():
+            terminalreporter.line(
+                f"{key:<10} запросов {statistics.median(v['requests'] for v in views):.0f}, "
+                f"передано {statistics.median(v['transfer'] for v in views) / 1024:.0f} КБ, "
+                f"распаковано {statistics.median(v['decoded'] for v in views) / 1024:.0f} КБ "
+                f"(просмотров {len(views)})"
+            )
@@ -0,0 +1,79 @@
+# utils/readiness.py
+"""
+Признаки готовности страниц.
+
+Каждый page object объявляет, по какому признаку страница считается готовой
+к работе: селектор-маркер, конкретный ответ API или флаг приложения.
+Навигация ждёт только этот признак вместо цепочки load/body/networkidle;
+BaseTest.wait_until_ready ограничивает ожидание бюджетом шага и записывает
+его время в метрики шагов для любого признака.
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+from playwright.sync_api import Page
+
+
+class Readiness(ABC):
+    """Базовый признак готовности."""
+
+    description = ""
+
+    def run(self, page: Page, action: Optional[Callable[[], None]], timeout: int) -> None:
+        """Выполняет действие (обычно навигацию) и ждёт готовности."""
+        if action:
+            action()
+        self.wait(page, timeout)
+
+    @abstractmethod
+    def wait(self, page: Page, timeout: int) -> None:
+        """Ждёт признака готовности не дольше `timeout` мс."""
+
+    def __str__(self) -> str:
+        return self.description
+
+
+class SelectorReady(Readiness):
+    """Страница готова, когда виден элемент-маркер."""
+
+    def __init__(self, selector: str, state: str = "visible"):
+        self.selector = selector
+        self.state = state
+        self.description = f"selector {selector}"
+
+    def wait(self, page: Page, timeout: int) -> None:
+        page.wait_for_selector(self.selector, state=self.state, timeout=timeout)
+
+
+class ResponseReady(Readiness):
+    """Страница готова, когда пришёл ответ API с подстрокой `url_part` в URL."""
+
+    def __init__(self, url_part: str, ok_only: bool = True):
+        self.url_part = url_part
+        self.ok_only = ok_only
+        self.description = f"response {url_part}"
+
+    def _check(self, response) -> None:
+        if self.ok_only and not response.ok:
+            raise AssertionError(f"Ответ {response.url} вернул HTTP {response.status}")
+
+    def run(self, page: Page, action: Optional[Callable[[], None]], timeout: int) -> None:
+        # Ожидание ответа взводится до действия, иначе быстрый ответ можно пропустить
+        if not action:
+            return self.wait(page, timeout)
+        with page.expect_response(lambda r: self.url_part in r.url, timeout=timeout) as info:
+            action()
+        self._check(info.value)
+
+    def wait(self, page: Page, timeout: int) -> None:
+        self._check(page.wait_for_response(lambda r: self.url_part in r.url, timeout=timeout))
+
+
+class FlagReady(Readiness):
+    """Страница готова, когда приложение выставило флаг window[flag] === true."""
+
+    def __init__(self, flag: str):
+        self.flag = flag
+        self.description = f"flag window.{flag}"
+
+    def wait(self, page: Page, timeout: int) -> None:
+        page.wait_for_function("(flag) => window[flag] === true", arg=self.flag, timeout=timeout)
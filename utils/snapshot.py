@@ -0,0 +1,139 @@
+# utils/snapshot.py
+"""
+Снимок состояния нескольких элементов страницы одним вызовом evaluate.
+
+Вместо цепочки is_element_visible, каждая из которых ждёт свой таймаут,
+BaseTest.snapshot() за один проход по DOM возвращает для каждого
+именованного селектора количество элементов, видимость, текст и атрибуты.
+
+JS-резолвер понимает CSS, псевдокласс Playwright :has-text("...") и цепочки
+через ">>" с частями text=... без кавычек — этого достаточно для локаторов
+page objects. Текст сравнивается как в Playwright: без учёта регистра, по
+подстроке, с схлопнутыми пробелами. Всё остальное (text="..." с точным
+совпадением, text=/regex/, xpath, role= и прочие движки, псевдоклассы
+Playwright вроде :visible) резолвер не угадывает, а отвергает — такие
+селекторы дочитываются через locator.
+"""
+from dataclasses import dataclass, field
+from typing import Optional
+
+SNAPSHOT_JS = r"""
+({selectors, attributes}) => {
+  const HAS_TEXT = /:has-text\((["'])(.*?)\1\)/;
+  const ENGINE = /^([a-zA-Z_-]+)=/;
+
+  // Как normalizeWhiteSpace в Playwright
+  const norm = (s) => (s || "").replace(/\u200b/g, "").trim().replace(/\s+/g, " ").toLowerCase();
+  const unsupported = (part) => { throw new Error(`не поддерживается резолвером: ${part}`); };
+
+  const visible = (el) => {
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== "hidden";
+  };
+  const textOf = (el) => (el.innerText || el.textContent || "").trim();
+
+  // Делит строку по разделителю верхнего уровня (вне кавычек и скобок)
+  const splitTop = (source, sep) => {
+    const parts = [];
+    let depth = 0, quote = null, start = 0;
+    for (let i = 0; i < source.length; i++) {
+      const ch = source[i];
+      if (quote) { if (ch === quote && source[i - 1] !== "\\") quote = null; continue; }
+      if (ch === '"' || ch === "'") quote = ch;
+      else if (ch === "(" || ch === "[") depth++;
+      else if (ch === ")" || ch === "]") depth--;
+      else if (depth === 0 && source.startsWith(sep, i)) {
+        parts.push(source.slice(start, i)); start = i + sep.length; i += sep.length - 1;
+      }
+    }
+    parts.push(source.slice(start));
+    return parts.map((p) => p.trim()).filter(Boolean);
+  };
+
+  // CSS с :has-text(): часть до псевдокласса ищется обычным querySelectorAll,
+  // остаток применяется относительно каждого найденного элемента
+  const queryCss = (root, css) => {
+    const match = HAS_TEXT.exec(css);
+    if (!match) return Array.from(root.querySelectorAll(css));
+    const head = css.slice(0, match.index) || "*";
+    const rest = css.slice(match.index + match[0].length);
+    const needle = norm(match[2]);
+    const found = Array.from(root.querySelectorAll(head))
+      .filter((el) => norm(el.textContent).includes(needle));
+    if (!rest.trim()) return found;
+    return found.flatMap((el) => queryCss(el, ":scope" + rest));
+  };
+
+  // text=... без кавычек: самые глубокие элементы, содержащие текст.
+  // text="..." (точное совпадение) и text=/regex/ отдаются locator
+  const queryText = (root, text) => {
+    if (/^["'/]/.test(text.trim())) unsupported("text=" + text);
+    const needle = norm(text);
+    const contains = (el) => norm(el.textContent).includes(needle);
+    return Array.from(root.querySelectorAll("*"))
+      .filter((el) => el.tagName !== "SCRIPT" && el.tagName !== "STYLE")
+      .filter((el) => contains(el) && !Array.from(el.children).some(contains));
+  };
+
+  const queryPart = (root, part) => {
+    const engine = ENGINE.exec(part);
+    if (engine && engine[1] === "text") return queryText(root, part.slice(5));
+    if (engine && engine[1] !== "css") unsupported(part);
+    if (part.startsWith("//") || part.startsWith("..")) unsupported(part);
+    // Псевдоклассы Playwright, кроме :has-text, querySelectorAll отвергает сам
+    return splitTop(part.replace(/^css=/, ""), ",").flatMap((alt) => queryCss(root, alt));
+  };
+
+  const resolve = (selector) => {
+    let scope = [document];
+    for (const part of splitTop(selector, ">>")) {
+      const next = new Set();
+      for (const root of scope) {
+        queryPart(root, part).forEach((el) => next.add(el));
+      }
+      scope = Array.from(next);
+    }
+    return scope;
+  };
+
+  const result = {};
+  for (const [name, selector] of Object.entries(selectors)) {
+    let elements;
+    try {
+      elements = resolve(selector);
+    } catch (e) {
+      result[name] = {error: String(e)};
+      continue;
+    }
+    const shown = elements.filter(visible);
+    const el = shown[0] || elements[0];
+    const attrs = {};
+    if (el) for (const a of attributes) attrs[a] = el.getAttribute(a);
+    result[name] = {count: elements.length, visible: shown.length > 0, text: el ? textOf(el) : "", attrs};
+  }
+  return result;
+}
+"""
+
+
+@dataclass
+class ElementState:
+    """Состояние элементов одного селектора в снимке."""
+    count: int = 0
+    visible: bool = False
+    text: str = ""
+    attrs: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def present(self) -> bool:
+        return self.count > 0
+
+    def __str__(self) -> str:
+        if self.error:
+            return f"ошибка селектора: {self.error}"
+        return f"count={self.count}, visible={self.visible}, text={self.text[:60]!r}"
+
+
+def format_snapshot(snapshot: dict[str, ElementState]) -> str:
+    return "\n".join(f"  {name}: {state}" for name, state in snapshot.items())
@@ -0,0 +1,125 @@
+# utils/teardown_queue.py
+"""
+Фоновая очередь очистки после тестов.
+
+Фикстуры ставят в очередь задания очистки (отключение 2FA через API, запись
+скриншотов и других артефактов), и следующий тест начинается, не дожидаясь
+их. Задания с одним ключом (например, email аккаунта) выполняются строго по
+порядку, а wait_for(key) — барьер: тест, которому нужен аккаунт, ждёт, пока
+очистка этого аккаунта завершится.
+
+Ошибки заданий не теряются: они привязываются к тесту-владельцу и выводятся
+в итогах прогона и в reports/teardown_failures.json.
+
+Синхронный API Playwright привязан к потоку, поэтому всё, что обращается к
+браузеру (закрытие контекста, снятие скриншота), выполняется в основном
+потоке; в фон уходит только работа без браузера. Поэтому скриншот снимается
+синхронно и задерживает тест на время захвата: в фоне только запись файла.
+Полностраничный захват (прокрутка и склейка длинной страницы) самый дорогой,
+его стоит делать только для упавших тестов, для прошедших хватает видимой
+области.
+"""
+import json
+import os
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+from playwright.sync_api import Page
+from utils.helpers import screenshot_path
+from utils.logger import logger
+
+TEARDOWN_WORKERS = int(os.getenv("TEARDOWN_WORKERS", "2"))
+TEARDOWN_FAILURES = os.path.join("reports", "teardown_failures.json")
+
+
+@dataclass
+class CleanupFailure:
+    owner: str
+    job: str
+    error: str
+
+
+class TeardownQueue:
+    """Исполнитель заданий очистки с барьерами по ключу."""
+
+    def __init__(self, workers: int = TEARDOWN_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="teardown")
+        self._lock = threading.Lock()
+        self._tails: dict[str, Future] = {}     # последнее задание для каждого ключа
+        self._pending: set[Future] = set()
+        self.failures: list[CleanupFailure] = []
+
+    def submit(self, owner: str, name: str, job: Callable[[], None], key: Optional[str] = None) -> Future:
+        """Ставит задание в очередь; задания с одинаковым ключом выполняются по порядку."""
+        with self._lock:
+            previous = self._tails.get(key) if key else None
+            future = self._executor.submit(self._run, owner, name, job, previous)
+            if key:
+                self._tails[key] = future
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def _run(self, owner: str, name: str, job: Callable[[], None], previous: Optional[Future]) -> None:
+        if previous is not None:
+            previous.exception()  # ждём предыдущее задание ключа, его ошибка уже учтена
+        try:
+            job()
+            logger.info(f"Очистка '{name}' для {owner} выполнена")
+        except Exception as e:
+            logger.error(f"Очистка '{name}' для {owner} не удалась: {e}")
+            with self._lock:
+                self.failures.append(CleanupFailure(owner, name, "".join(traceback.format_exception_only(e)).strip()))
+            raise
+
+    def wait_for(self, key: str) -> None:
+        """Барьер: ждёт завершения всех заданий очистки с ключом `key`."""
+        with self._lock:
+            tail = self._tails.get(key)
+        if tail is not None and not tail.done():
+            logger.info(f"Ожидание фоновой очистки: {key}")
+            tail.exception()
+
+    def screenshot(self, page: Page, name: str, owner: str, full_page: bool = False) -> str:
+        """
+        Снимает скриншот в основном потоке (по умолчанию — только видимую
+        область), а запись файла ставит в очередь.
+        """
+        path = screenshot_path(name)
+        data = page.screenshot(full_page=full_page)
+
+        def write() -> None:
+            with open(path, "wb") as f:
+                f.write(data)
+
+        self.submit(owner, f"скриншот {os.path.basename(path)}", write)
+        return path
+
+    def drain(self) -> None:
+        """Дожидается всех заданий."""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.exception()
+
+    # --- pytest-хуки ---
+
+    def pytest_sessionfinish(self, session) -> None:
+        self.drain()
+        self._executor.shutdown(wait=True)
+        if self.failures:
+            os.makedirs(os.path.dirname(TEARDOWN_FAILURES), exist_ok=True)
+            with open(TEARDOWN_FAILURES, "w", encoding="utf-8") as f:
+                json.dump([vars(x) for x in self.failures], f, ensure_ascii=False, indent=2)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if self.failures:
+            terminalreporter.section("Ошибки фоновой очистки", red=True)
+            for failure in self.failures:
+                terminalreporter.line(f"{failure.owner} — {failure.job}: {failure.error}")
@@ -0,0 +1,239 @@
+# utils/visual_regression.py
+"""
+Визуальная регрессия по скриншотам из screenshots/.
+
+Для каждого кадра считается перцептивный хэш (DCT по уменьшенной копии 32x32,
+64 бита), хэши всего прогона сравниваются с эталонным набором одной
+векторной операцией NumPy. Подробный разбор по областям строится только для
+кадров, у которых расстояние Хэмминга превысило порог.
+
+Кадры сопоставляются по имени без временной метки take_screenshot:
+after_disable_2fa_2025-07-28_17-02-54.png -> after_disable_2fa.
+Для каждого имени берётся самый свежий кадр.
+
+Запуск:
+    python -m utils.visual_regression update   # обновить эталон
+    python -m utils.visual_regression check    # сравнить с эталоном
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+import numpy as np
+from PIL import Image
+from utils.logger import logger
+
+SCREENSHOTS_DIR = "screenshots"
+BASELINE_DIR = os.path.join(SCREENSHOTS_DIR, "baseline")
+REPORTS_DIR = os.path.join("reports", "visual")
+
+HASH_SIZE = 8            # 8x8 низкочастотных коэффициентов -> 64 бита
+SAMPLE_SIZE = 32         # сторона уменьшенной копии для DCT
+DIFF_WIDTH = 320         # ширина копии для разбора по областям
+CELL = 16                # размер ячейки сетки при разборе, px уменьшенной копии
+THRESHOLD = int(os.getenv("VISUAL_THRESHOLD", "10"))
+CELL_THRESHOLD = float(os.getenv("VISUAL_CELL_THRESHOLD", "12"))
+
+_TIMESTAMP = re.compile(r"_\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}$")
+
+
+def screenshot_key(filename: str) -> str:
+    """Имя кадра без временной метки и расширения."""
+    return _TIMESTAMP.sub("", os.path.splitext(os.path.basename(filename))[0])
+
+
+def latest_screenshots(directory: str = SCREENSHOTS_DIR) -> dict[str, str]:
+    """Самый свежий файл для каждого имени кадра (метка времени сортируется лексикографически)."""
+    latest: dict[str, str] = {}
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(".png"):
+            latest[screenshot_key(name)] = os.path.join(directory, name)
+    return latest
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.sqrt(2 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    m[0] /= np.sqrt(2)
+    return m
+
+
+_DCT = _dct_matrix(SAMPLE_SIZE)
+
+
+def _load_gray(path: str, size: tuple[int, int]) -> np.ndarray:
+    with Image.open(path) as img:
+        img = img.convert("L")
+        # reduce() на порядок быстрее resize() на полноразмерных скриншотах
+        factor = max(1, min(img.width // (size[0] * 4), img.height // (size[1] * 4)))
+        if factor > 1:
+            img = img.reduce(factor)
+        return np.asarray(img.resize(size, Image.BILINEAR), dtype=np.float32)
+
+
+def _load_samples(paths: list[str]) -> np.ndarray:
+    with ThreadPoolExecutor() as pool:
+        frames = list(pool.map(lambda p: _load_gray(p, (SAMPLE_SIZE, SAMPLE_SIZE)), paths))
+    return np.stack(frames)
+
+
+def phash_batch(paths: list[str]) -> np.ndarray:
+    """Перцептивные хэши пачки кадров: массив bool формы (N, 64)."""
+    if not paths:
+        return np.zeros((0, HASH_SIZE * HASH_SIZE), dtype=bool)
+    samples = _load_samples(paths)
+    coeffs = _DCT @ samples @ _DCT.T
+    low = coeffs[:, :HASH_SIZE, :HASH_SIZE].reshape(len(paths), -1)
+    # DC-коэффициент (средняя яркость) не участвует в медиане
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return low > median
+
+
+def update_baseline(directory: str = SCREENSHOTS_DIR, baseline_dir: str = BASELINE_DIR) -> int:
+    """Сохраняет текущие кадры и их хэши как эталон."""
+    latest = latest_screenshots(directory)
+    keys = sorted(latest)
+    os.makedirs(baseline_dir, exist_ok=True)
+    for key in keys:
+        shutil.copyfile(latest[key], os.path.join(baseline_dir, f"{key}.png"))
+    hashes = phash_batch([latest[k] for k in keys])
+    np.savez_compressed(os.path.join(baseline_dir, "hashes.npz"), keys=np.array(keys), hashes=hashes)
+    logger.info(f"Эталон обновлён: {len(keys)} кадров в {baseline_dir}")
+    return len(keys)
+
+
+def _regions(mask: np.ndarray) -> list[tuple[int, int, int, int]]:
+    """Связные области отмеченных ячеек сетки: (row0, col0, row1, col1) включительно."""
+    seen = np.zeros_like(mask, dtype=bool)
+    regions = []
+    rows, cols = mask.shape
+    for r, c in zip(*np.nonzero(mask)):
+        if seen[r, c]:
+            continue
+        stack = [(r, c)]
+        seen[r, c] = True
+        r0, c0, r1, c1 = r, c, r, c
+        while stack:
+            y, x = stack.pop()
+            r0, c0, r1, c1 = min(r0, y), min(c0, x), max(r1, y), max(c1, x)
+            for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+                if 0 <= ny < rows and 0 <= nx < cols and mask[ny, nx] and not seen[ny, nx]:
+                    seen[ny, nx] = True
+                    stack.append((ny, nx))
+        regions.append((int(r0), int(c0), int(r1), int(c1)))
+    return regions
+
+
+def region_diff(current_path: str, baseline_path: str, out_path: Optional[str] = None) -> dict:
+    """
+    Подробное сравнение двух кадров по сетке ячеек: изменившиеся области
+    в координатах исходного скриншота и, при out_path, тепловая карта отличий.
+    """
+    with Image.open(current_path) as cur_img, Image.open(baseline_path) as base_img:
+        cur_size, base_size = cur_img.size, base_img.size
+    scale = cur_size[0] / DIFF_WIDTH
+    cur_height = max(1, int(cur_size[1] / scale))
+    base_height = max(1, int(base_size[1] * DIFF_WIDTH / base_size[0]))
+    # Кадры разной высоты сравниваются по общей верхней части
+    height = min(cur_height, base_height) // CELL * CELL
+    if height < CELL:
+        # Кадр ниже одной ячейки сетки: сравнивать нечего, весь кадр считается изменённым
+        return {
+            "size_changed": True,
+            "current_size": list(cur_size),
+            "baseline_size": list(base_size),
+            "changed_ratio": 1.0,
+            "regions": [{"x": 0, "y": 0, "width": cur_size[0], "height": cur_size[1]}],
+        }
+    cur = _load_gray(current_path, (DIFF_WIDTH, cur_height))[:height]
+    base = _load_gray(baseline_path, (DIFF_WIDTH, base_height))[:height]
+
+    diff = np.abs(cur - base)
+    grid = diff.reshape(height // CELL, CELL, DIFF_WIDTH // CELL, CELL).mean(axis=(1, 3))
+    mask = grid > CELL_THRESHOLD
+    regions = [
+        {
+            "x": int(c0 * CELL * scale), "y": int(r0 * CELL * scale),
+            "width": int((c1 - c0 + 1) * CELL * scale), "height": int((r1 - r0 + 1) * CELL * scale),
+        }
+        for r0, c0, r1, c1 in _regions(mask)
+    ]
+    if out_path:
+        heat = np.clip(diff * 4, 0, 255).astype(np.uint8)
+        Image.fromarray(heat).save(out_path)
+    return {
+        "size_changed": cur_size != base_size,
+        "current_size": list(cur_size),
+        "baseline_size": list(base_size),
+        "changed_ratio": round(float(mask.mean()), 4),
+        "regions": regions,
+    }
+
+
+def check(directory: str = SCREENSHOTS_DIR, baseline_dir: str = BASELINE_DIR,
+          threshold: int = THRESHOLD, out_dir: str = REPORTS_DIR) -> dict:
+    """Сравнивает свежие кадры с эталоном и возвращает отчёт."""
+    stored = np.load(os.path.join(baseline_dir, "hashes.npz"))
+    base_keys = [str(k) for k in stored["keys"]]
+    base_index = {k: i for i, k in enumerate(base_keys)}
+
+    latest = latest_screenshots(directory)
+    keys = [k for k in sorted(latest) if k in base_index]
+    current = phash_batch([latest[k] for k in keys])
+    baseline = stored["hashes"][[base_index[k] for k in keys]]
+    distances = (current != baseline).sum(axis=1) if keys else np.empty(0, dtype=int)
+
+    os.makedirs(out_dir, exist_ok=True)
+    regressions = {}
+    for key, distance in zip(keys, distances):
+        if distance > threshold:
+            details = region_diff(latest[key], os.path.join(baseline_dir, f"{key}.png"),
+                                  os.path.join(out_dir, f"{key}_diff.png"))
+            regressions[key] = {"distance": int(distance), "file": latest[key], **details}
+
+    return {
+        "threshold": threshold,
+        "compared": len(keys),
+        "new": sorted(set(latest) - set(base_index)),
+        "missing": sorted(set(base_index) - set(latest)),
+        "distances": {k: int(d) for k, d in zip(keys, distances)},
+        "regressions": regressions,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Визуальная регрессия скриншотов по перцептивным хэшам")
+    parser.add_argument("command", choices=["update", "check"])
+    parser.add_argument("--dir", default=SCREENSHOTS_DIR, help="Каталог со скриншотами")
+    parser.add_argument("--baseline", default=BASELINE_DIR, help="Каталог эталона")
+    parser.add_argument("--threshold", type=int, default=THRESHOLD, help="Допустимое расстояние Хэмминга (из 64)")
+    args = parser.parse_args(argv)
+
+    if args.command == "update":
+        update_baseline(args.dir, args.baseline)
+        return 0
+
+    if not os.path.exists(os.path.join(args.baseline, "hashes.npz")):
+        parser.error(f"Эталон не найден в {args.baseline} — сначала выполните update")
+    report = check(args.dir, args.baseline, args.threshold)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    path = os.path.join(REPORTS_DIR, f"visual_regression_{timestamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for key, item in report["regressions"].items():
+        logger.error(f"Визуальная регрессия {key}: расстояние {item['distance']}, областей {len(item['regions'])}")
+    logger.info(
+        f"Сравнено кадров: {report['compared']}, регрессий: {len(report['regressions'])}, "
+        f"новых: {len(report['new'])}, отсутствуют: {len(report['missing'])}. Отчёт: {path}"
+    )
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())